@@ -86,7 +86,12 @@ class AnalysisAgent:
             # Safely extract document insights
             document_insights = "No document insights available"
             if hasattr(request, 'retriever_data') and request.retriever_data:
-                document_insights = getattr(request.retriever_data, 'response', 'No document insights available')
+                chunks = getattr(request.retriever_data, 'chunks', None)
+                if chunks:
+                    # Raw excerpts from the retriever's /retrieve mode go into the prompt as-is
+                    document_insights = self._format_chunks(chunks)
+                else:
+                    document_insights = getattr(request.retriever_data, 'response', 'No document insights available')
 
             return {
                 "api_data": api_data,
@@ -105,6 +110,16 @@ class AnalysisAgent:
                 "user_query": getattr(request, 'user_query', 'No query provided')
             }
 
+    @staticmethod
+    def _format_chunks(chunks) -> str:
+        """Number and attribute retrieved chunks (models or plain dicts) for the analysis prompts"""
+        excerpts = []
+        for i, chunk in enumerate(chunks, start=1):
+            fields = chunk if isinstance(chunk, dict) else vars(chunk)
+            source = fields.get('source') or 'unknown source'
+            excerpts.append(f"[{i}] {source}\n{fields.get('text', '')}")
+        return "\n\n".join(excerpts)
+
     async def _generate_analysis(self, combined_data: dict) -> str:
         """Generate detailed market and company analysis using LLM"""
         try:
@@ -127,7 +142,7 @@ You are a financial analyst. Based on the following data, provide a detailed ana
 ### Document Insights:
 {combined_data.get('document_insights', 'No insights available')}
 
-Give a concise, professional financial analysis.
+Give a concise, professional financial analysis. When document excerpts are numbered, cite them as [n].
 """
             response = llm_manager.openai_chat_llm.predict(prompt)
             return response
@@ -0,0 +1,44 @@
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when a stage's queue is full; the API turns it into a 503."""
+
+
+class BoundedExecutor:
+    """Thread pool for the blocking pipeline stages with a hard cap on queued work.
+
+    rapidfuzz, SentenceTransformer and FAISS release the GIL in their hot loops, so
+    threads give real parallelism while sharing one copy of the model and index.
+    Submitting beyond max_workers + max_queue raises Overloaded instead of queueing.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chronos-worker")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise Overloaded(f"{self.max_workers + self.max_queue} requests already in flight")
+        try:
+            # Carry the caller's context (e.g. the request trace) into the worker thread
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the work really finishes, even if the caller gives up
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
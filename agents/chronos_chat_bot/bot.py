@@ -1,24 +1,38 @@
 #https://github.com/Fawadkhanse/ai-fintech-agent-api/blob/master/README.md
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import requests
-from rapidfuzz import fuzz
-import re
+from typing import List
 import json
 from dotenv import load_dotenv
 import os
-from sentence_transformers import SentenceTransformer, util
-import faiss
-import numpy as np
 import logging
 import time
 import random  
-import re
+import secrets
 import traceback
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from fastapi.middleware.cors import CORSMiddleware
-import ollama
-from ollama import Client
+# sentence_transformers (torch), faiss and ollama are imported lazily during warm-up
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from embedding_backend import load_encoder
+from intent_classifier import IntentClassifier
+from keyword_matcher import TriggerRules
+from embedding_cache import QueryEncoder, normalize_query
+from kb_index import IndexConfig, index_digest, load_or_build_index, normalize
+from llm_client import LLMClient
+from backpressure import BoundedExecutor, Overloaded
+from metrics import Metrics
+from semantic_cache import SemanticCache
+from session_store import create_session_store
+from warmup import Warmup, WarmingUp
+
 # Initialize FastAPI app
 app = FastAPI()
 load_dotenv()
@@ -38,27 +52,45 @@ app.add_middleware(
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Per-stage latency histograms and counters for /metrics; CHRONOS_TRACING=0 turns them into no-ops
+metrics = Metrics(enabled=os.getenv("CHRONOS_TRACING", "1") != "0")
+
 
 # Load data from JSON files
 base_dir = os.path.dirname(os.path.abspath(__file__))  # directory where script lives
 
-try:
-    with open(os.path.join(base_dir, "intents.json"), "r") as f:
-        intents = json.load(f)
-    with open(os.path.join(base_dir, "response.json"), "r") as f:
-        responses = json.load(f)
-    with open(os.path.join(base_dir, "knowledge_base.json"), "r") as f:
-        knowledge_base = json.load(f)
-except FileNotFoundError as e:
-    logging.error(f"Missing JSON file: {e.filename}")
-    raise ValueError(f"Missing required file: {e.filename}")
-except json.JSONDecodeError as e:
-    logging.error(f"Malformed JSON in file: {e.msg}")
-    raise ValueError(f"Invalid JSON format in one of the files.")
-except Exception as e:
-    traceback.print_exc()
-    logging.error(f"Unexpected error: {e}")
-    raise
+content_files = ("intents.json", "response.json", "knowledge_base.json", "bill_rules.json")
+
+def load_content():
+    try:
+        with open(os.path.join(base_dir, "intents.json"), "r") as f:
+            intents = json.load(f)
+        with open(os.path.join(base_dir, "response.json"), "r") as f:
+            responses = json.load(f)
+        with open(os.path.join(base_dir, "knowledge_base.json"), "r") as f:
+            knowledge_base = json.load(f)
+    except FileNotFoundError as e:
+        logging.error(f"Missing JSON file: {e.filename}")
+        raise ValueError(f"Missing required file: {e.filename}")
+    except json.JSONDecodeError as e:
+        logging.error(f"Malformed JSON in file: {e.msg}")
+        raise ValueError(f"Invalid JSON format in one of the files.")
+    except Exception as e:
+        traceback.print_exc()
+        logging.error(f"Unexpected error: {e}")
+        raise
+    if not all(isinstance(data, dict) for data in (intents, responses, knowledge_base)):
+        raise ValueError("intents.json, response.json and knowledge_base.json must each hold a JSON object.")
+    return intents, responses, knowledge_base
+
+intents, responses, knowledge_base = load_content()
+
+# Build the intent classifier once; every /chat call reuses it
+intent_classifier = IntentClassifier(intents)
+
+# Cancel / bill-type / pay-bill triggers, compiled into one multi-pattern matcher
+bill_rules_path = os.path.join(base_dir, "bill_rules.json")
+trigger_rules = TriggerRules.from_file(bill_rules_path)
 
 
 # Define request model
@@ -66,78 +98,231 @@ class ChatRequest(BaseModel):
     message: str
     user_id: str
 
+class BatchChatRequest(BaseModel):
+    messages: List[str]
+    top_k: int = 3
+
+batch_chunk_size = int(os.getenv("CHRONOS_BATCH_CHUNK_SIZE", "256"))
+batch_max_messages = int(os.getenv("CHRONOS_BATCH_MAX_MESSAGES", "100000"))
+
+# Embedding model path (the relative default assumes the server runs from this directory)
+model_path = os.path.abspath(os.getenv("CHRONOS_EMBEDDING_MODEL", "../../../hf_models/all-MiniLM-L6-v2"))
+embedding_model = None
+
+# Inference backend for the embedding model: torch (fp32), onnx or onnx-int8 (CPU-only nodes)
+embedding_backend = os.getenv("CHRONOS_EMBEDDING_BACKEND", "torch")
+# Backends produce slightly different vectors, so each one gets its own saved index
+embedding_fingerprint = f"{model_path}|{embedding_backend}"
+
 # Load the embedding model
-try:
-    # embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', use_auth_token=os.getenv("HF_API_TOKEN"))
-    model_path = os.path.abspath("../../../hf_models/all-MiniLM-L6-v2")
-    print("Model path:", model_path)
-    print("Exists:", os.path.exists(model_path))
-    embedding_model = SentenceTransformer(model_path)
-
-except Exception as e:
-    traceback.print_exc()
-    logging.error(f"Error loading embedding model: {e}")
-    raise ValueError("Failed to load the embedding model.")
-
-# Initialize FAISS index
-def initialize_faiss_index():
+def load_embedding_model():
     try:
-        questions = list(knowledge_base.keys())
-        if not questions:
-            raise ValueError("Knowledge base is empty. Cannot initialize FAISS index.")
-        embeddings = embedding_model.encode(questions)
-        embeddings = np.array(embeddings).astype('float32')
-        index = faiss.IndexFlatL2(embeddings.shape[1])
-        index.add(embeddings)
+        # embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', use_auth_token=os.getenv("HF_API_TOKEN"))
+        print("Model path:", model_path)
+        print("Exists:", os.path.exists(model_path))
+        print("Embedding backend:", embedding_backend)
+        return load_encoder(
+            model_path,
+            backend=embedding_backend,
+            cache_root=os.getenv("CHRONOS_ONNX_CACHE_DIR", os.path.join(base_dir, ".onnx_cache")),
+            threads=int(os.getenv("CHRONOS_ONNX_THREADS", "0")),
+        )
+
+    except Exception as e:
+        traceback.print_exc()
+        logging.error(f"Error loading embedding model: {e}")
+        raise ValueError("Failed to load the embedding model.")
+
+# Index backend (flat / ivf / hnsw) over normalized vectors; similarity threshold is cosine
+index_config = IndexConfig.from_env()
+# 0.5 cosine matches the old L2 < 1.0 cutoff for MiniLM's unit-length embeddings
+kb_min_similarity = float(os.getenv("CHRONOS_KB_MIN_SIMILARITY", "0.5"))
+
+index_cache_dir = os.getenv("CHRONOS_INDEX_CACHE_DIR", os.path.join(base_dir, ".index_cache"))
 
-        return index, questions
+# Initialize FAISS index (loaded from the on-disk cache when knowledge_base.json is unchanged)
+def initialize_faiss_index(encode_fn):
+    try:
+        return load_or_build_index(
+            os.path.join(base_dir, "knowledge_base.json"),
+            knowledge_base,
+            encode_fn,
+            cache_dir=index_cache_dir,
+            fingerprint=embedding_fingerprint,
+            config=index_config,
+        )
 
     except Exception as e:
         traceback.print_exc()
         logging.error(f"Error initializing FAISS index: {e}")
         raise
 
-faiss_index, faiss_questions = initialize_faiss_index()
+# Index, id -> question map and answers, swapped as one object on reload
+knowledge_index = None
 
-# Session management
-sessions = {}
+# Background warm-up: the model load and the saved-index load run in parallel; only a
+# stale index has to wait for the model to re-encode the knowledge base
+warmup = Warmup(["embedding_model", "faiss_index"])
 
-# Cleanup inactive sessions
-def cleanup_inactive_sessions():
-    current_time = time.time()
-    for user_id, session in list(sessions.items()):
-        if "last_active" in session and current_time - session["last_active"] > 600:  # 10 minutes
-            del sessions[user_id]
-            logging.info(f"Session for user {user_id} expired and was removed.")
+def warm_up():
+    global embedding_model, knowledge_index
 
-def update_session_activity(user_id):
-    if user_id in sessions:
-        sessions[user_id]["last_active"] = time.time()
+    def model_stage():
+        with warmup.stage("embedding_model"):
+            return load_embedding_model()
 
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="chronos-warmup") as pool:
+        model_future = pool.submit(model_stage)
+        with warmup.stage("faiss_index"):
+            index = initialize_faiss_index(lambda texts: model_future.result().encode(texts))
+        embedding_model = model_future.result()
 
-def classify_intent(user_input):
-    best_match, highest_score = None, 0
-    user_input = user_input.lower()
-    for intent, keywords in intents.items():
-        for keyword in keywords:
-            score = fuzz.token_sort_ratio(user_input, keyword)
-            if score > highest_score:
-                highest_score, best_match = score, intent
-                logging.info(f"Intent: {intent}, Keyword: {keyword}, Score: {score}")
+    knowledge_index = index
+
+# Query embeddings: LRU cache for repeated phrasings, micro-batched encode for concurrent misses
+query_encoder = QueryEncoder(
+    lambda texts: embedding_model.encode(texts),
+    cache_size=int(os.getenv("CHRONOS_EMBED_CACHE_SIZE", "1024")),
+    max_batch_size=int(os.getenv("CHRONOS_EMBED_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("CHRONOS_EMBED_BATCH_WAIT_MS", "5")),
+)
+
+# Shared async LLM client: pooled connections, bounded concurrency, per-request timeout
+llm_client = LLMClient(
+    model=os.getenv("CHRONOS_LLM_MODEL", "deepseek-r1"),
+    host=os.getenv("OLLAMA_HOST"),
+    max_concurrency=int(os.getenv("CHRONOS_LLM_MAX_CONCURRENCY", "4")),
+    timeout=float(os.getenv("CHRONOS_LLM_TIMEOUT", "120")),
+    max_queue=int(os.getenv("CHRONOS_LLM_MAX_QUEUE", "32")),
+)
+
+# Worker threads for the blocking stages (fuzzy matching, embedding, FAISS, session I/O)
+cpu_executor = BoundedExecutor(
+    max_workers=int(os.getenv("CHRONOS_WORKERS", str(min(8, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv("CHRONOS_WORKER_QUEUE", "64")),
+)
+
+# Semantic cache of LLM answers, matched on the same MiniLM query embeddings as the knowledge base
+semantic_cache = SemanticCache(
+    min_similarity=float(os.getenv("CHRONOS_SEMANTIC_CACHE_SIMILARITY", "0.92")),
+    ttl=float(os.getenv("CHRONOS_SEMANTIC_CACHE_TTL", "3600")),
+    maxsize=int(os.getenv("CHRONOS_SEMANTIC_CACHE_SIZE", "1000")),
+    path=os.getenv("CHRONOS_SEMANTIC_CACHE_PATH"),
+)
 
-    return best_match if highest_score > 70 else "fallback"
+# Session management (memory / sqlite / redis via CHRONOS_SESSION_BACKEND); sessions expire after
+# CHRONOS_SESSION_TTL seconds of inactivity without any scan on the request path
+session_store = create_session_store()
+
+# Hot reload of intents.json / response.json / knowledge_base.json
+reload_lock = threading.Lock()
+
+def content_mtimes():
+    return {name: os.stat(os.path.join(base_dir, name)).st_mtime_ns for name in content_files}
+
+def reload_content():
+    """Re-read the content files and swap in what changed without interrupting requests.
+
+    The intent classifier is rebuilt off to the side and published with one assignment.
+    The knowledge-base index is patched incrementally: only new questions are encoded.
+    """
+    global intents, responses, knowledge_base, intent_classifier, knowledge_index, trigger_rules
+
+    with reload_lock:
+        # Hash before reading: if the file changes in between, the saved index looks stale, never fresh
+        digest = index_digest(os.path.join(base_dir, "knowledge_base.json"), embedding_fingerprint, index_config)
+        new_intents, new_responses, new_knowledge_base = load_content()
+        try:
+            new_trigger_rules = TriggerRules.from_file(bill_rules_path)
+        except (OSError, KeyError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid bill_rules.json: {e}")
+        summary = {"intents": "unchanged", "responses": "unchanged", "knowledge_base": "unchanged", "bill_rules": "unchanged"}
+
+        if new_knowledge_base != knowledge_base:
+            if not warmup.ready:
+                raise WarmingUp("Knowledge base index is still loading")
+            start = time.perf_counter()
+            index, changes = knowledge_index.updated(new_knowledge_base, embedding_model.encode)
+            knowledge_index, knowledge_base = index, new_knowledge_base
+            summary["knowledge_base"] = {**changes, "seconds": round(time.perf_counter() - start, 3)}
+            try:
+                index.save(index_cache_dir, digest)
+            except OSError as e:
+                logging.warning(f"Could not persist updated FAISS index: {e}")
+
+        if new_intents != intents:
+            intent_classifier = IntentClassifier(new_intents)
+            intents = new_intents
+            summary["intents"] = "rebuilt"
+
+        if new_responses != responses:
+            responses = new_responses
+            summary["responses"] = "replaced"
+
+        if new_trigger_rules.config != trigger_rules.config:
+            trigger_rules = new_trigger_rules
+            summary["bill_rules"] = "rebuilt"
+
+        logging.info(f"Content reload: {summary}")
+        return summary
+
+reload_interval = float(os.getenv("CHRONOS_RELOAD_INTERVAL", "0"))
+
+def watch_content_files():
+    """Poll the content files' mtimes and reload when one changes (CHRONOS_RELOAD_INTERVAL seconds, 0 = off)."""
+    seen = content_mtimes()
+    while True:
+        time.sleep(reload_interval)
+        try:
+            current = content_mtimes()
+            if current != seen and warmup.ready:
+                reload_content()
+                seen = current
+        except Exception as e:
+            logging.error(f"Content reload failed, keeping the previous version: {e}")
+
+
+@metrics.timed("intent")
+def classify_intent(user_input):
+    return intent_classifier.classify(user_input)
 
 # Retrieve from knowledge base
+@metrics.timed("knowledge_base")
 def retrieve_from_knowledge_base(query):
-    query_embedding = np.array([embedding_model.encode(query.lower())]).astype('float32')
-    distances, indices = faiss_index.search(query_embedding, k=1)
-    logging.info(f"FAISS Search - Distances: {distances}, Indices: {indices}")
-    if distances[0][0] < 1.0 and indices[0][0] < len(faiss_questions):
-        return knowledge_base.get(faiss_questions[indices[0][0]], None)
+    index = knowledge_index
+    matches = index.search(query_encoder.encode(query), k=1)[0]
+    logging.info(f"FAISS Search - Matches: {matches}")
+    if matches and matches[0][1] > kb_min_similarity:
+        return index.answers.get(matches[0][0], None)
     return None
 
+# Batch classification + retrieval for offline replays: one cdist, one encode and one FAISS search per chunk
+@metrics.timed("batch")
+def process_batch(messages, top_k, offset=0):
+    index = knowledge_index
+    intents_found = intent_classifier.classify_batch(messages)
+    all_matches = index.search(embedding_model.encode([normalize_query(message) for message in messages]), top_k)
+
+    results = []
+    for i, message in enumerate(messages):
+        matches = [
+            {"question": question, "similarity": round(similarity, 4)}
+            for question, similarity in all_matches[i]
+        ]
+        kb_answer = None
+        if matches and matches[0]["similarity"] > kb_min_similarity:
+            kb_answer = index.answers.get(matches[0]["question"])
+        results.append({
+            "index": offset + i,
+            "message": message,
+            "intent": intents_found[i],
+            "kb_answer": kb_answer,
+            "kb_matches": matches,
+        })
+    return results
+
 # Generate response via API
-def generate_response_api(user_input, max_length=100):
+def build_prompt(user_input):
     # HF_API_TOKEN, MODEL_ID = os.getenv("HF_API_TOKEN"), os.getenv("MODEL_ENDPOINT")
     
     # if not HF_API_TOKEN or not MODEL_ID:
@@ -161,6 +346,22 @@ def generate_response_api(user_input, max_length=100):
 
     Your helpful and accurate response:
     """
+    return prompt
+
+
+@metrics.timed("semantic_cache")
+def lookup_semantic_cache(user_input):
+    query_vector = normalize(query_encoder.encode(user_input))
+    return query_vector, semantic_cache.lookup(query_vector)
+
+
+async def generate_response_api(user_input, max_length=100):
+    query_vector, cached = await cpu_executor.run(lookup_semantic_cache, user_input)
+    if cached is not None:
+        metrics.mark_route("semantic_cache")
+        return cached
+
+    prompt = build_prompt(user_input)
 
     # headers = {"Authorization": f"Bearer {HF_API_TOKEN}"}
     # payload = {
@@ -188,66 +389,94 @@ def generate_response_api(user_input, max_length=100):
         # return extracted_response if extracted_response else "I couldn't generate a suitable response."
         
         ## using local LLM models
-        client = ollama.Client()
-        response = client.generate(model='deepseek-r1', prompt=prompt)
+        start = time.perf_counter()
+        metrics.mark_route("llm")
+        with metrics.stage("llm"):
+            cleaned_text = await llm_client.generate(prompt)
+        semantic_cache.store(query_vector, user_input, cleaned_text, time.perf_counter() - start)
 
-        cleaned_text = re.sub(r'<think>.*?</think>', '', response['response'].strip(), flags=re.DOTALL).strip()
-        # Remove surrounding double quotes if present
-        if cleaned_text.startswith('"') and cleaned_text.endswith('"'):
-            cleaned_text = cleaned_text[1:-1].strip()
-        
         print("Response from local model!!")
         return cleaned_text
-            
+
+    except Overloaded:
+        raise
+    except asyncio.TimeoutError:
+        logging.error(f"LLM generation timed out after {llm_client.timeout}s")
+        return "The assistant is taking too long to respond. Please try again later."
     except Exception as e:
         traceback.print_exc()
         logging.error(f"Hugging Face API error: {e}")
         return "An error occurred while generating a response."
 
 
-# AI agent logic
-def ai_agent(user_id, user_input):
+async def stream_response_api(user_input):
+    try:
+        query_vector, cached = await cpu_executor.run(lookup_semantic_cache, user_input)
+        if cached is not None:
+            metrics.mark_route("semantic_cache")
+            yield cached
+            return
+
+        start = time.perf_counter()
+        tokens = []
+        metrics.mark_route("llm")
+        with metrics.stage("llm_stream"):
+            async for token in llm_client.stream(build_prompt(user_input)):
+                tokens.append(token)
+                yield token
+        semantic_cache.store(query_vector, user_input, "".join(tokens), time.perf_counter() - start)
+    except Overloaded:
+        yield "The assistant is busy right now. Please try again shortly."
+    except asyncio.TimeoutError:
+        logging.error(f"LLM stream timed out after {llm_client.timeout}s")
+        yield "The assistant is taking too long to respond. Please try again later."
+    except Exception as e:
+        traceback.print_exc()
+        logging.error(f"LLM streaming error: {e}")
+        yield "An error occurred while generating a response."
+
+
+# AI agent logic: rule, intent and knowledge-base stages; None means the LLM should answer
+@metrics.timed("route")
+def route_message(user_id, user_input):
     try:
-        cleanup_inactive_sessions()
         user_input_lower = user_input.lower().strip()
+        rules = trigger_rules
+        # One pass resolves the cancel command, any bill type and any pay-bill phrase
+        triggers = rules.scan(user_input_lower)
 
         # Handle "stop" or "cancel" commands globally
-        if user_input_lower in ["stop", "cancel"]:
-            if user_id in sessions:
-                del sessions[user_id]  # Remove the session
+        if triggers.cancel:
+            if session_store.delete(user_id):  # Remove the session
                 return "Session canceled. Type 'help' if you need assistance."
             else:
                 return "No active session to cancel."
 
         # Detect specific bill types directly in the input
-        bill_types = ["electricity", "water", "internet"]
-        detected_bill_type = None
-        for bill_type in bill_types:
-            if bill_type in user_input_lower:
-                detected_bill_type = bill_type
-                break
+        bill_types = rules.bill_types
+        detected_bill_type = triggers.bill_type
 
         # If a specific bill type is detected, start the session directly
         if detected_bill_type:
-            sessions[user_id] = {
+            session_store.set(user_id, {
                 "state": "bill_number",
                 "bill_type": detected_bill_type,
-                "last_active": time.time()
-            }
+            })
             return f"Please enter your {detected_bill_type} bill number."
 
         # Handle session-based interactions (Bill Payment Flow)
-        if user_id in sessions:
-            update_session_activity(user_id)
-            session = sessions[user_id]
+        session = session_store.get(user_id)
+        if session is not None:
             state = session.get("state")
 
             if state == "bill_type":
                 bill_type = user_input_lower
                 if bill_type in bill_types:
                     session["bill_type"], session["state"] = bill_type, "bill_number"
+                    session_store.set(user_id, session)
                     return f"Please enter your {bill_type} bill number."
-                return "Invalid bill type. Type 'stop' to cancel or choose from electricity, water, or internet."
+                session_store.set(user_id, session)  # Refresh inactivity timer
+                return f"Invalid bill type. Type 'stop' to cancel or choose from {rules.bill_type_choices()}."
 
             elif state == "bill_number":
                 user_input_cleaned = user_input_lower.replace(" ", "")
@@ -255,66 +484,234 @@ def ai_agent(user_id, user_input):
                     # Simulate an amount in PKR
                     amount_pkr = random.randint(500, 5000)  # Random amount between 500 and 5000 PKR
                     session["bill_number"], session["amount_pkr"], session["state"] = user_input_lower, amount_pkr, "payment_confirmation"
+                    session_store.set(user_id, session)
                     return f"Confirm payment of {amount_pkr} PKR for bill number {user_input_cleaned}? (yes/no)"
+                session_store.set(user_id, session)  # Refresh inactivity timer
                 return "Invalid bill number. Type 'stop' to cancel or enter a valid numeric bill number."
 
             elif state == "payment_confirmation":
                 if user_input_lower in ["yes", "y"]:
                     bill_type, bill_number, amount_pkr = session["bill_type"], session["bill_number"], session["amount_pkr"]
-                    del sessions[user_id]  # End session after confirmation
+                    session_store.delete(user_id)  # End session after confirmation
                     return f"Payment of {amount_pkr} PKR for {bill_type} bill (Bill No: {bill_number}) has been successfully submitted."
                 elif user_input_lower in ["no", "n"]:
-                    del sessions[user_id]  # Cancel session
+                    session_store.delete(user_id)  # Cancel session
                     return "Payment canceled."
+                session_store.set(user_id, session)  # Refresh inactivity timer
                 return "Invalid response. Type 'stop' to cancel or confirm with 'yes' or 'no'."
 
         # Detect if user wants to start a bill payment session
-        if any(keyword in user_input_lower for keyword in ["pay bill", "i want to pay my bill", "pay my bill", "pay my bills"]):
-            sessions[user_id] = {"state": "bill_type", "last_active": time.time()}
-            return "What type of bill would you like to pay? (electricity, water, internet)? Type 'stop' to cancel."
+        if triggers.pay_bill:
+            session_store.set(user_id, {"state": "bill_type"})
+            return f"What type of bill would you like to pay? ({rules.bill_type_choices()})? Type 'stop' to cancel."
 
         # Classify intent
         intent = classify_intent(user_input)
         if intent == "pay_bills":
-            sessions[user_id] = {"state": "bill_type", "last_active": time.time()}
-            return "What type of bill would you like to pay? (electricity, water, internet)? Type 'stop' to cancel."
+            session_store.set(user_id, {"state": "bill_type"})
+            return f"What type of bill would you like to pay? ({rules.bill_type_choices()})? Type 'stop' to cancel."
 
         if intent != "fallback":
+            metrics.mark_route("intent")
             return responses.get(intent, "I'm sorry, I didn't understand that.")
 
-        # Knowledge Base Retrieval
+        # Knowledge Base Retrieval (needs the embedding model and index from warm-up)
+        if not warmup.ready:
+            raise WarmingUp("Knowledge base is still loading")
         kb_response = retrieve_from_knowledge_base(user_input)
         if kb_response:
+            metrics.mark_route("knowledge_base")
             return kb_response
 
-        # AI-generated response (fallback)
-        return generate_response_api(user_input)
+        return None
 
+    except WarmingUp:
+        raise
     except Exception as e:
         traceback.print_exc()
         logging.error(f"Error processing input: {e}")
         return "An error occurred. Please try again later."
-    
+
+
+async def ai_agent(user_id, user_input):
+    trace = metrics.start_trace()
+    try:
+        with metrics.stage("request"):
+            response = await cpu_executor.run(route_message, user_id, user_input)
+            if response is None:
+                # AI-generated response (fallback)
+                response = await generate_response_api(user_input)
+        return response
+    finally:
+        metrics.finish_trace(trace)
+
+
 # FastAPI endpoints
-@app.post("/chat")
-async def chat(request: ChatRequest):
+def validate_request(request):
     user_id = request.user_id.strip()
     user_input = request.message.strip()
-    
+
     if not user_input or not user_id:
         raise HTTPException(status_code=400, detail="Invalid message or user ID.")
-    
+
     if not user_id.isalnum():
         raise HTTPException(status_code=400, detail="User ID must be alphanumeric.")
-    
+
+    return user_id, user_input
+
+def not_ready_error():
+    """HTTP error for requests that need the knowledge base before warm-up has succeeded"""
+    if warmup.failed:
+        # Nothing retries a failed warm-up, so a retry hint would only keep clients looping
+        return HTTPException(status_code=500, detail="The knowledge base is unavailable. Please contact support.")
+    return HTTPException(status_code=503, detail="The assistant is still starting up. Please retry shortly.", headers={"Retry-After": "5"})
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    user_id, user_input = validate_request(request)
+
     try:
-        response = ai_agent(user_id, user_input)
+        response = await ai_agent(user_id, user_input)
         return {"response": response}
+    except Overloaded as e:
+        logging.warning(f"Rejecting /chat request: {e}")
+        raise HTTPException(status_code=503, detail="Server is busy. Please retry shortly.", headers={"Retry-After": "1"})
+    except WarmingUp:
+        raise not_ready_error()
     except Exception as e:
         traceback.print_exc()
         logging.error(f"Unexpected error: {e}")
         return {"response": "Sorry, something went wrong. Please try again later."}
 
+async def traced_stream(stack, chunks):
+    """Yield chunks, then close stack (request stage and trace) when the response stream ends."""
+    with stack:
+        async for chunk in chunks:
+            yield chunk
+
+
+async def iterate_text(text):
+    yield text
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Same pipeline as /chat, but LLM answers are streamed token by token as plain text."""
+    user_id, user_input = validate_request(request)
+
+    # Like ai_agent, but the request stage and the trace stay open until the stream is consumed
+    trace = metrics.start_trace()
+    stack = ExitStack()
+    stack.callback(metrics.finish_trace, trace)
+    stack.enter_context(metrics.stage("request"))
+    try:
+        response = await cpu_executor.run(route_message, user_id, user_input)
+    except Overloaded as e:
+        with stack:
+            logging.warning(f"Rejecting /chat/stream request: {e}")
+            raise HTTPException(status_code=503, detail="Server is busy. Please retry shortly.", headers={"Retry-After": "1"})
+    except WarmingUp:
+        with stack:
+            raise not_ready_error()
+    except BaseException:
+        with stack:
+            raise
+    chunks = iterate_text(response) if response is not None else stream_response_api(user_input)
+    return StreamingResponse(traced_stream(stack, chunks), media_type="text/plain")
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """Classify and retrieve for many messages at once; results stream back as NDJSON, one line per message.
+
+    Stateless: no sessions are touched and the LLM is never called.
+    """
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="No messages provided.")
+    if len(request.messages) > batch_max_messages:
+        raise HTTPException(status_code=400, detail=f"At most {batch_max_messages} messages per batch.")
+    if not 1 <= request.top_k <= 50:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 50.")
+    if not warmup.ready:
+        raise not_ready_error()
+
+    messages = [message.strip() for message in request.messages]
+
+    async def generate():
+        for start in range(0, len(messages), batch_chunk_size):
+            chunk = messages[start:start + batch_chunk_size]
+            try:
+                results = await cpu_executor.run(process_batch, chunk, request.top_k, start)
+            except Overloaded as e:
+                logging.warning(f"Stopping /chat/batch at message {start}: {e}")
+                yield json.dumps({"index": start, "error": "Server is busy. Resubmit the remaining messages."}) + "\n"
+                return
+            for result in results:
+                yield json.dumps(result) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.on_event("startup")
+async def start_warmup():
+    # Heavy loading happens off the event loop so / and /ready answer immediately
+    warmup.start(warm_up)
+    if reload_interval > 0:
+        threading.Thread(target=watch_content_files, name="chronos-content-watcher", daemon=True).start()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.aclose()
+    semantic_cache.save()
+    session_store.close()
+    cpu_executor.shutdown()
+
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the AI Fintech Agent API"}
\ No newline at end of file
+    return {"message": "Welcome to the AI Fintech Agent API"}
+
+def collect_cache_metrics():
+    embeddings = query_encoder.cache.stats()
+    semantic = semantic_cache.stats()
+    yield ("chronos_cache_lookups_total", "counter", "Cache lookups by cache and result.", {"cache": "query_embedding", "result": "hit"}, embeddings["hits"])
+    yield ("chronos_cache_lookups_total", "counter", "Cache lookups by cache and result.", {"cache": "query_embedding", "result": "miss"}, embeddings["misses"])
+    yield ("chronos_cache_lookups_total", "counter", "Cache lookups by cache and result.", {"cache": "semantic", "result": "hit"}, semantic["hits"])
+    yield ("chronos_cache_lookups_total", "counter", "Cache lookups by cache and result.", {"cache": "semantic", "result": "miss"}, semantic["misses"])
+    yield ("chronos_cache_entries", "gauge", "Entries currently held by each cache.", {"cache": "query_embedding"}, embeddings["size"])
+    yield ("chronos_cache_entries", "gauge", "Entries currently held by each cache.", {"cache": "semantic"}, semantic["size"])
+    yield ("chronos_semantic_cache_saved_llm_seconds_total", "counter", "LLM generation time avoided by semantic cache hits.", {}, semantic["saved_llm_seconds"])
+    yield ("chronos_rejected_requests_total", "counter", "Requests rejected with 503 because the worker queue was full.", {}, cpu_executor.rejected)
+
+metrics.register_collector(collect_cache_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: str = Header(default="")):
+    admin_token = os.getenv("CHRONOS_ADMIN_TOKEN")
+    # Fail closed: without a configured token the endpoint is off (CORS allows any origin)
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set CHRONOS_ADMIN_TOKEN to enable them.")
+    if not secrets.compare_digest(x_admin_token.encode("utf-8"), admin_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    try:
+        summary = await asyncio.to_thread(reload_content)
+    except WarmingUp:
+        raise not_ready_error()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "reloaded", "changes": summary}
+
+@app.get("/ready")
+async def ready():
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/stats")
+async def stats():
+    return {
+        "embedding_backend": embedding_backend,
+        "query_embeddings": query_encoder.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "rejected_requests": cpu_executor.rejected,
+    }
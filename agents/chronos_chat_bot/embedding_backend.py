@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxEncoder:
+    """Sentence encoder running the exported transformer in ONNX Runtime.
+
+    Reproduces the sentence-transformers pipeline of the source model (tokenize, transformer,
+    mean or CLS pooling, optional L2 normalize) so vectors stay comparable with the torch path.
+    """
+
+    def __init__(self, model_path, onnx_path, batch_size=32, threads=0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.batch_size = batch_size
+        self.max_seq_length, self.pooling, self.normalize = read_pipeline_config(model_path)
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batches = [self._encode_batch(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        vectors = np.concatenate(batches) if batches else np.empty((0, 0), dtype="float32")
+        return vectors[0] if single else vectors
+
+    def _encode_batch(self, texts):
+        features = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {name: features[name].astype("int64") for name in self.input_names if name in features}
+        hidden = self.session.run(None, inputs)[0]
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = features["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype("float32")
+
+
+def read_pipeline_config(model_path):
+    """(max_seq_length, pooling, normalize) from the sentence-transformers files next to the weights."""
+    max_seq_length, pooling, normalize = 256, "mean", False
+
+    config_path = os.path.join(model_path, "sentence_bert_config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            max_seq_length = json.load(f).get("max_seq_length", max_seq_length)
+
+    modules_path = os.path.join(model_path, "modules.json")
+    if os.path.exists(modules_path):
+        with open(modules_path, "r") as f:
+            modules = json.load(f)
+        for module in modules:
+            if module["type"].endswith("Normalize"):
+                normalize = True
+            elif module["type"].endswith("Pooling"):
+                with open(os.path.join(model_path, module["path"], "config.json"), "r") as f:
+                    pooling_config = json.load(f)
+                if pooling_config.get("pooling_mode_cls_token"):
+                    pooling = "cls"
+                elif not pooling_config.get("pooling_mode_mean_tokens", True):
+                    raise ValueError(f"Unsupported pooling for the ONNX backend: {pooling_config}")
+
+    return max_seq_length, pooling, normalize
+
+
+def export_onnx(model_path, onnx_dir):
+    """Export the transformer to ONNX once; later starts reuse the file."""
+    onnx_path = os.path.join(onnx_dir, "model.onnx")
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    logger.info(f"Exporting {model_path} to ONNX in {onnx_dir}")
+    os.makedirs(onnx_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).eval()
+    sample = tokenizer(["warm up"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    tmp_path = f"{onnx_path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    os.replace(tmp_path, onnx_path)
+    return onnx_path
+
+
+def quantize_onnx(onnx_path):
+    """Int8 dynamic quantization of the exported graph (weights int8, activations quantized per batch)."""
+    quantized_path = onnx_path.replace(".onnx", "_int8.onnx")
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"Quantizing {onnx_path} to int8")
+    tmp_path = f"{quantized_path}.tmp"
+    quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+def onnx_cache_dir(model_path, cache_root):
+    # One directory per model location, so switching CHRONOS_EMBEDDING_MODEL never reuses a stale export
+    tag = hashlib.sha256(os.path.abspath(model_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_root, f"{os.path.basename(os.path.normpath(model_path))}-{tag}")
+
+
+def load_encoder(model_path, backend="torch", cache_root=".onnx_cache", threads=0):
+    """Sentence encoder with an .encode(texts) method for the chosen backend.
+
+    torch      - SentenceTransformer, fp32 PyTorch (the original path)
+    onnx       - the same graph exported to ONNX, run by ONNX Runtime
+    onnx-int8  - the ONNX graph with int8 dynamic quantization of its MatMul weights
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_path)
+
+    onnx_path = export_onnx(model_path, onnx_cache_dir(model_path, cache_root))
+    if backend == "onnx-int8":
+        onnx_path = quantize_onnx(onnx_path)
+    return OnnxEncoder(model_path, onnx_path, threads=threads)
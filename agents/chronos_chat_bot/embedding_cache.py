@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text):
+    """Cache key for a query: lowercase with collapsed whitespace."""
+    return " ".join(text.lower().split())
+
+
+class LRUCache:
+    """Thread-safe bounded mapping with least-recently-used eviction and hit/miss counters."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class EmbeddingBatcher:
+    """Collects encode requests from concurrent callers for a few milliseconds and encodes them in one call.
+
+    Callers block on encode() until their vector is ready, so this works from plain
+    sync code and from worker threads alike.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, max_wait_ms=5):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.encoded = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def encode(self, text):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Identical phrasings arriving together are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = np.asarray(self.encode_fn(texts), dtype="float32")
+                by_text = dict(zip(texts, vectors))
+                for text, future in batch:
+                    future.set_result(by_text[text])
+            except Exception as e:
+                logger.error(f"Batched encode of {len(texts)} queries failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.encoded += len(texts)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "avg_batch_size": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class QueryEncoder:
+    """Normalized-query embedding lookup: LRU cache first, micro-batched model call on a miss."""
+
+    def __init__(self, encode_fn, cache_size=1024, max_batch_size=32, max_wait_ms=5):
+        self.cache = LRUCache(cache_size)
+        self.batcher = EmbeddingBatcher(encode_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def encode(self, query):
+        key = normalize_query(query)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.batcher.encode(key)
+            self.cache.put(key, vector)
+        return vector
+
+    def stats(self):
+        return {"cache": self.cache.stats(), "batcher": self.batcher.stats()}
@@ -0,0 +1,96 @@
+import logging
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+logger = logging.getLogger(__name__)
+
+
+def sort_tokens(text):
+    """Whitespace tokens in sorted order, so token_sort_ratio becomes a plain ratio on the result."""
+    return " ".join(sorted(text.split()))
+
+
+class IntentClassifier:
+    """Fuzzy intent matcher built once from intents.json and reused for every message.
+
+    Scores are those of the original loop, token_sort_ratio(message.lower(), keyword): only
+    the message is lowercased, keywords keep their case and punctuation and are token-sorted once.
+    """
+
+    def __init__(self, intents, threshold=70, fallback="fallback"):
+        self.threshold = threshold
+        self.fallback = fallback
+        self.keywords = []
+        self.labels = []
+        self.exact = {}
+
+        for intent, keywords in intents.items():
+            for keyword in keywords:
+                tokens = sort_tokens(keyword)
+                if not tokens:
+                    continue
+                self.keywords.append(tokens)
+                self.labels.append(intent)
+                # A score of 100; the first such keyword wins, like the original nested loop
+                self.exact.setdefault(tokens, intent)
+
+        logger.info(f"Intent classifier built with {len(self.keywords)} keywords across {len(intents)} intents")
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def classify(self, user_input):
+        query = sort_tokens(user_input.lower())
+        if not query:
+            return self.fallback
+
+        # Same tokens as a keyword: no need to score the keyword table at all
+        intent = self.exact.get(query)
+        if intent is not None:
+            return intent
+
+        match = process.extractOne(
+            query,
+            self.keywords,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=self.threshold,
+        )
+        if match is None:
+            return self.fallback
+
+        _, score, position = match
+        logger.debug(f"Intent: {self.labels[position]}, Keyword: {self.keywords[position]}, Score: {score}")
+        return self.labels[position] if score > self.threshold else self.fallback
+
+    def classify_batch(self, messages):
+        """classify() for many messages, scoring all of them against all keywords in one cdist call."""
+        results = [self.fallback] * len(messages)
+        pending, queries = [], []
+        for i, message in enumerate(messages):
+            query = sort_tokens(message.lower())
+            if not query:
+                continue
+            intent = self.exact.get(query)
+            if intent is not None:
+                results[i] = intent
+            else:
+                pending.append(i)
+                queries.append(query)
+
+        if queries and self.keywords:
+            scores = process.cdist(
+                queries,
+                self.keywords,
+                scorer=fuzz.ratio,
+                processor=None,
+                score_cutoff=self.threshold,
+                workers=-1,
+            )
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(queries)), best]
+            for i, position, score in zip(pending, best, best_scores):
+                if score > self.threshold:
+                    results[i] = self.labels[position]
+        return results
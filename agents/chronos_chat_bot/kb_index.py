@@ -0,0 +1,275 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# faiss is imported inside the functions that use it, so importing this module stays cheap
+
+INDEX_FILE = "knowledge_base.faiss"
+META_FILE = "knowledge_base.meta.json"
+
+INDEX_BACKENDS = ("flat", "ivf", "hnsw")
+
+# Bumped when the on-disk layout changes so older saved indexes are rebuilt
+FORMAT_VERSION = "2"
+
+
+@dataclass
+class IndexConfig:
+    """Index backend and its build/search knobs.
+
+    All backends use inner product over L2-normalized vectors, i.e. cosine similarity.
+    nlist / hnsw_m / ef_construction shape the saved index; nprobe / ef_search are
+    applied at load time and can be tuned without a rebuild.
+    """
+
+    backend: str = "flat"
+    nlist: int = 0  # IVF centroids; 0 picks ~sqrt(n)
+    nprobe: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+
+    def __post_init__(self):
+        if self.backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend '{self.backend}', expected one of {INDEX_BACKENDS}")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            backend=os.getenv("CHRONOS_INDEX_BACKEND", "flat").lower(),
+            nlist=int(os.getenv("CHRONOS_IVF_NLIST", "0")),
+            nprobe=int(os.getenv("CHRONOS_IVF_NPROBE", "8")),
+            hnsw_m=int(os.getenv("CHRONOS_HNSW_M", "32")),
+            ef_construction=int(os.getenv("CHRONOS_HNSW_EF_CONSTRUCTION", "80")),
+            ef_search=int(os.getenv("CHRONOS_HNSW_EF_SEARCH", "64")),
+        )
+
+    def fingerprint(self):
+        """Only the parameters baked into the saved index; search-time settings are excluded."""
+        if self.backend == "ivf":
+            return f"ivf:{self.nlist}"
+        if self.backend == "hnsw":
+            return f"hnsw:{self.hnsw_m}:{self.ef_construction}"
+        return "flat"
+
+
+def normalize(vectors):
+    import faiss
+
+    vectors = np.array(vectors, dtype="float32", ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def content_hash(path, extra=""):
+    """sha256 of the knowledge base file plus anything else the vectors depend on (e.g. the model)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    digest.update(extra.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_index(embeddings, config=None, ids=None):
+    """Build an id-addressable index; ids default to row positions."""
+    import faiss
+
+    config = config or IndexConfig()
+    embeddings = normalize(embeddings)
+    n, dim = embeddings.shape
+    ids = np.arange(n, dtype="int64") if ids is None else np.asarray(ids, dtype="int64")
+
+    if config.backend == "ivf":
+        nlist = config.nlist or int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    elif config.backend == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = config.ef_construction
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    index.add_with_ids(embeddings, ids)
+    configure_search(index, config)
+    return index
+
+
+def configure_search(index, config):
+    """Apply search-time settings (nprobe / efSearch) to a built or loaded index."""
+    import faiss
+
+    if config.backend == "ivf":
+        faiss.extract_index_ivf(index).nprobe = config.nprobe
+    elif config.backend == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efSearch = config.ef_search
+
+
+class KnowledgeBaseIndex:
+    """A FAISS index together with the id -> question map and the answers it serves.
+
+    Instances are never modified after construction: updated() returns a new one, so
+    request handlers can keep a reference while a reload swaps in the replacement.
+    """
+
+    def __init__(self, index, questions, answers, config):
+        self.index = index
+        self.questions = questions  # faiss id -> question
+        self.answers = answers  # question -> answer
+        self.config = config
+        self.ids = {question: faiss_id for faiss_id, question in questions.items()}
+        self.next_id = max(questions, default=-1) + 1
+
+    def __len__(self):
+        return len(self.questions)
+
+    def search(self, vectors, k=1):
+        """Top-k (question, cosine similarity) pairs per query vector."""
+        similarities, ids = self.index.search(normalize(vectors), k)
+        return [
+            [(self.questions[j], float(similarity)) for similarity, j in zip(row_similarities, row_ids) if j in self.questions]
+            for row_similarities, row_ids in zip(similarities, ids)
+        ]
+
+    def updated(self, knowledge_base, encode_fn):
+        """Apply a new knowledge_base dict, encoding only the questions that are new.
+
+        Flat and IVF indexes are copied and patched with remove_ids/add_with_ids; HNSW
+        cannot delete, so it is rebuilt from the stored vectors plus the new ones.
+        """
+        import faiss
+
+        added = [question for question in knowledge_base if question not in self.ids]
+        removed = [question for question in self.ids if question not in knowledge_base]
+        changed = sum(
+            1 for question, answer in knowledge_base.items()
+            if question in self.ids and self.answers.get(question) != answer
+        )
+        summary = {"added": len(added), "removed": len(removed), "answers_changed": changed}
+        if not added and not removed:
+            return KnowledgeBaseIndex(self.index, self.questions, dict(knowledge_base), self.config), summary
+
+        questions = dict(self.questions)
+        removed_ids = np.array([self.ids[question] for question in removed], dtype="int64")
+        for faiss_id in removed_ids:
+            del questions[int(faiss_id)]
+        added_ids = np.arange(self.next_id, self.next_id + len(added), dtype="int64")
+        questions.update(zip(added_ids.tolist(), added))
+        vectors = normalize(encode_fn(added)) if added else None
+
+        if self.config.backend == "hnsw":
+            kept_ids = np.array([faiss_id for faiss_id in self.questions if faiss_id in questions], dtype="int64")
+            kept = self.index.reconstruct_batch(kept_ids) if len(kept_ids) else np.empty((0, self.index.d), dtype="float32")
+            all_vectors = kept if vectors is None else np.vstack([kept, vectors])
+            index = build_index(all_vectors, self.config, ids=np.concatenate([kept_ids, added_ids]))
+        else:
+            # Copy first: the live index is still serving and may be memory-mapped. clone_index
+            # would keep viewing the mapped codes, which cannot be resized, so round-trip instead
+            index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            configure_search(index, self.config)
+            if len(removed_ids):
+                index.remove_ids(removed_ids)
+            if vectors is not None:
+                index.add_with_ids(vectors, added_ids)
+
+        return KnowledgeBaseIndex(index, questions, dict(knowledge_base), self.config), summary
+
+    def save(self, cache_dir, digest):
+        """Write index and metadata via temp files so a concurrent reader never sees a half-written pair."""
+        import faiss
+
+        os.makedirs(cache_dir, exist_ok=True)
+        index_path = os.path.join(cache_dir, INDEX_FILE)
+        meta_path = os.path.join(cache_dir, META_FILE)
+        suffix = f".tmp{os.getpid()}"
+
+        faiss.write_index(self.index, index_path + suffix)
+        with open(meta_path + suffix, "w") as f:
+            json.dump({
+                "hash": digest,
+                "dim": self.index.d,
+                "ids": list(self.questions.keys()),
+                "questions": list(self.questions.values()),
+            }, f)
+
+        os.replace(index_path + suffix, index_path)
+        os.replace(meta_path + suffix, meta_path)
+
+
+def index_digest(knowledge_base_path, fingerprint, config):
+    return content_hash(knowledge_base_path, f"{FORMAT_VERSION}|{fingerprint}|{config.fingerprint()}")
+
+
+def mmap_flag():
+    """faiss read flag that memory-maps an index's flat codes, or 0 when this faiss build has none.
+
+    IO_FLAG_MMAP only maps IVF inverted lists (as read-only on-disk lists) and still reads flat
+    and HNSW storage into RAM; IO_FLAG_MMAP_IFC maps the codes of every backend used here.
+    """
+    import faiss
+
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if flag is None:
+        logger.info(f"faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC; saved indexes are read into memory")
+        return 0
+    return flag
+
+
+def load_index(cache_dir, digest, mmap=True):
+    """Load (memory-mapped by default) the saved index if its hash matches; returns (index, {id: question}) or None."""
+    import faiss
+
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    meta_path = os.path.join(cache_dir, META_FILE)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("hash") != digest:
+            logger.info("Saved FAISS index is stale (knowledge base changed); rebuilding")
+            return None
+        index = faiss.read_index(index_path, mmap_flag() if mmap else 0)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not load saved FAISS index, rebuilding: {e}")
+        return None
+
+    if index.ntotal != len(meta["questions"]):
+        logger.warning("Saved FAISS index does not match its question list; rebuilding")
+        return None
+    return index, dict(zip(meta["ids"], meta["questions"]))
+
+
+def load_or_build_index(knowledge_base_path, knowledge_base, encode_fn, cache_dir, fingerprint="", config=None):
+    config = config or IndexConfig()
+    start = time.perf_counter()
+    digest = index_digest(knowledge_base_path, fingerprint, config)
+
+    loaded = load_index(cache_dir, digest)
+    if loaded is not None:
+        index, questions = loaded
+        configure_search(index, config)
+        logger.info(f"FAISS index cold start: {time.perf_counter() - start:.3f}s (warm, {index.ntotal} vectors loaded from {cache_dir})")
+        return KnowledgeBaseIndex(index, questions, knowledge_base, config)
+
+    questions = list(knowledge_base.keys())
+    if not questions:
+        raise ValueError("Knowledge base is empty. Cannot initialize FAISS index.")
+    kb_index = KnowledgeBaseIndex(build_index(encode_fn(questions), config), dict(enumerate(questions)), knowledge_base, config)
+    try:
+        kb_index.save(cache_dir, digest)
+    except OSError as e:
+        logger.warning(f"Could not persist FAISS index to {cache_dir}: {e}")
+
+    logger.info(f"FAISS index cold start: {time.perf_counter() - start:.3f}s (rebuilt {config.backend}, {len(kb_index)} vectors encoded)")
+    return kb_index
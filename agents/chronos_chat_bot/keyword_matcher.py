@@ -0,0 +1,107 @@
+import json
+import logging
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+Triggers = namedtuple("Triggers", ["cancel", "bill_type", "pay_bill"])
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every occurrence of every phrase in one pass over the text.
+
+    Cost per message is linear in its length plus the number of matches, independent of
+    how many phrases are loaded.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for phrase, payload in patterns:
+            self._add(phrase, payload)
+        self._link()
+
+    def _add(self, phrase, payload):
+        if not phrase:
+            return
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(phrase), payload))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end here via the failure chain
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """(start, end, payload) for every phrase occurrence in text."""
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payload in self._output[state]:
+                matches.append((position - length + 1, position + 1, payload))
+        return matches
+
+
+class TriggerRules:
+    """Bill-payment rule tables from bill_rules.json, compiled into a single matcher.
+
+    bill_types maps each bill type to the phrases that select it (earlier types win when
+    several appear), pay_bill_triggers start the payment flow, and cancel_commands must
+    match the whole message.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.bill_types = list(config["bill_types"])
+        self.cancel_commands = {command.lower() for command in config.get("cancel_commands", [])}
+        patterns = []
+        for priority, (bill_type, phrases) in enumerate(config["bill_types"].items()):
+            for phrase in phrases:
+                patterns.append((phrase.lower(), ("bill_type", priority, bill_type)))
+        for phrase in config.get("pay_bill_triggers", []):
+            patterns.append((phrase.lower(), ("pay_bill", 0, phrase)))
+        self.matcher = KeywordMatcher(patterns)
+        logger.info(f"Trigger rules compiled: {len(patterns)} phrases, {len(self.bill_types)} bill types")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def scan(self, user_input_lower):
+        """Resolve cancel, bill type and pay-bill triggers for an already-lowercased message."""
+        if user_input_lower in self.cancel_commands:
+            return Triggers(cancel=True, bill_type=None, pay_bill=False)
+
+        best_bill, pay_bill = None, False
+        for _, _, (kind, priority, value) in self.matcher.find_all(user_input_lower):
+            if kind == "bill_type":
+                if best_bill is None or priority < best_bill[0]:
+                    best_bill = (priority, value)
+            else:
+                pay_bill = True
+        return Triggers(cancel=False, bill_type=best_bill[1] if best_bill else None, pay_bill=pay_bill)
+
+    def bill_type_choices(self):
+        return ", ".join(self.bill_types)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+
+from backpressure import Overloaded
+
+logger = logging.getLogger(__name__)
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+def clean_response(text):
+    """Drop <think> blocks and surrounding quotes from a complete model answer."""
+    # Same rules as the streaming path, so /chat and /chat/stream return the same text
+    stripper = ThinkStripper()
+    return stripper.feed(text) + stripper.flush()
+
+
+def _partial_tag_length(text, tag):
+    """Length of the longest suffix of text that is a proper prefix of tag."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkStripper:
+    """Removes <think>...</think> blocks from a token stream, even when tags are split across chunks.
+
+    The concatenated output is trimmed like a complete answer: no leading or trailing
+    whitespace, and an answer wrapped in double quotes loses them. Trailing whitespace is
+    held back until more text follows; an answer starting with a quote is held back whole
+    until flush(), since only its end decides whether the quote is dropped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._started = False
+        self._quoted = False
+        self._held = ""
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        out = []
+        while True:
+            if self._in_think:
+                end = self._buffer.find(THINK_CLOSE)
+                if end == -1:
+                    keep = _partial_tag_length(self._buffer, THINK_CLOSE)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(THINK_CLOSE):]
+                self._in_think = False
+            else:
+                start = self._buffer.find(THINK_OPEN)
+                if start == -1:
+                    keep = _partial_tag_length(self._buffer, THINK_OPEN)
+                    out.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                out.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(THINK_OPEN):]
+                self._in_think = True
+        return self._emit("".join(out))
+
+    def flush(self):
+        tail = self._emit("" if self._in_think else self._buffer)
+        self._buffer = ""
+        if not self._quoted:
+            # Trailing whitespace still held back is dropped
+            return tail
+        body = self._held.rstrip()
+        self._held = ""
+        if not body or body.endswith('"'):
+            return body[:-1].strip()
+        return '"' + body
+
+    def _emit(self, text):
+        # Nothing before the first visible character is sent
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+            if text.startswith('"'):
+                self._quoted = True
+                text = text[1:]
+        if self._quoted:
+            self._held += text
+            return ""
+        text = self._held + text
+        visible = text.rstrip()
+        self._held = text[len(visible):]
+        return visible
+
+
+class LLMClient:
+    """Long-lived async ollama client shared by all requests.
+
+    The underlying httpx pool keeps connections to the ollama server open, a semaphore
+    caps concurrent generations, and every call is bounded by a per-request timeout
+    that includes time spent waiting for a slot. More than max_queue callers waiting
+    for a slot raises Overloaded.
+    """
+
+    def __init__(self, model, host=None, max_concurrency=4, timeout=120.0, max_queue=32):
+        self.model = model
+        self.host = host
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import ollama
+
+            self._client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+        return self._client
+
+    async def _acquire(self, deadline):
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise Overloaded(f"{self._waiting} generations already waiting for the LLM")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max(deadline - time.monotonic(), 0))
+        finally:
+            self._waiting -= 1
+
+    async def generate(self, prompt):
+        deadline = time.monotonic() + self.timeout
+        await self._acquire(deadline)
+        try:
+            response = await asyncio.wait_for(
+                self.client.generate(model=self.model, prompt=prompt),
+                max(deadline - time.monotonic(), 0),
+            )
+        finally:
+            self._semaphore.release()
+        return clean_response(response["response"])
+
+    async def stream(self, prompt):
+        """Yield answer text as the model produces it, with <think> blocks removed."""
+        deadline = time.monotonic() + self.timeout
+        await self._acquire(deadline)
+        try:
+            parts = await asyncio.wait_for(
+                self.client.generate(model=self.model, prompt=prompt, stream=True),
+                max(deadline - time.monotonic(), 0),
+            )
+            iterator = parts.__aiter__()
+            stripper = ThinkStripper()
+            while True:
+                try:
+                    part = await asyncio.wait_for(iterator.__anext__(), max(deadline - time.monotonic(), 0))
+                except StopAsyncIteration:
+                    break
+                text = stripper.feed(part["response"])
+                if text:
+                    yield text
+            tail = stripper.flush()
+            if tail:
+                yield tail
+        finally:
+            self._semaphore.release()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
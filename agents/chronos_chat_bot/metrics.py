@@ -0,0 +1,181 @@
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_trace = contextvars.ContextVar("chronos_trace", default=None)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class _NoopStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.stage_seconds.observe(elapsed, stage=self.name)
+        if exc_type is not None:
+            self.metrics.stage_errors.inc(stage=self.name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["stages"].append((self.name, elapsed))
+        return False
+
+
+class Metrics:
+    """Per-stage latency histograms and pipeline counters, exported in Prometheus text format.
+
+    When disabled, stage() hands back a shared no-op context manager and the
+    counters/trace helpers return immediately, so instrumentation costs one attribute check.
+    """
+
+    def __init__(self, enabled=True, prefix="chronos"):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(f"{prefix}_stage_duration_seconds", "Time spent in each ai_agent pipeline stage.")
+        self.stage_errors = Counter(f"{prefix}_stage_errors_total", "Pipeline stages that raised.")
+        self.responses = Counter(f"{prefix}_responses_total", "Answers by the stage that produced them.")
+        self._collectors = []
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NOOP_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name):
+        """Decorator form of stage() for sync and async functions."""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.stage(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def start_trace(self):
+        """Begin collecting stage timings for the current request (context-local)."""
+        if not self.enabled:
+            return None
+        trace = {"route": "rules", "stages": []}
+        _current_trace.set(trace)
+        return trace
+
+    def mark_route(self, route):
+        """Record which stage answered the current request."""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["route"] = route
+
+    def finish_trace(self, trace):
+        if trace is None:
+            return
+        self.responses.inc(route=trace["route"])
+        if logger.isEnabledFor(logging.DEBUG):
+            stages = " ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in trace["stages"])
+            logger.debug(f"trace route={trace['route']} {stages}")
+
+    def register_collector(self, fn):
+        """fn() returns (name, type, help, {labels}, value) tuples rendered on every scrape."""
+        self._collectors.append(fn)
+
+    def render(self):
+        lines = []
+        for metric in (self.stage_seconds, self.stage_errors, self.responses):
+            lines.extend(metric.render())
+        seen = set()
+        for collector in self._collectors:
+            for name, metric_type, help_text, labels, value in collector():
+                if name not in seen:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    seen.add(name)
+                lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
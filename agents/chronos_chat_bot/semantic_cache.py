@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """LLM answers keyed by query embedding; a new query within min_similarity (cosine) reuses the answer.
+
+    Entries expire after ttl seconds and the least recently used one is evicted past maxsize.
+    Vectors must be L2-normalized. With a path, entries are loaded at start and written by save().
+    """
+
+    def __init__(self, min_similarity=0.92, ttl=3600, maxsize=1000, path=None):
+        self.min_similarity = min_similarity
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.saved_llm_seconds = 0.0
+        self._entries = OrderedDict()  # id -> {"vector", "query", "answer", "created", "llm_seconds"}
+        self._next_id = 0
+        self._matrix = None
+        self._matrix_ids = []
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _search_matrix(self):
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix = np.array([self._entries[key]["vector"] for key in self._matrix_ids], dtype="float32")
+        return self._matrix, self._matrix_ids
+
+    def lookup(self, vector):
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        with self._lock:
+            self._expire(time.time())
+            if self._entries:
+                matrix, ids = self._search_matrix()
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.min_similarity:
+                    key = ids[best]
+                    entry = self._entries[key]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_llm_seconds += entry["llm_seconds"]
+                    logger.info(f"Semantic cache hit ({similarities[best]:.3f}) for '{entry['query']}'")
+                    return entry["answer"]
+            self.misses += 1
+            return None
+
+    def store(self, vector, query, answer, llm_seconds):
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        with self._lock:
+            self._entries[self._next_id] = {
+                "vector": vector,
+                "query": query,
+                "answer": answer,
+                "created": time.time(),
+                "llm_seconds": llm_seconds,
+            }
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_llm_seconds": round(self.saved_llm_seconds, 3),
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._expire(time.time())
+            entries = [
+                {**entry, "vector": entry["vector"].tolist()}
+                for entry in self._entries.values()
+            ]
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved {len(entries)} semantic cache entries to {self.path}")
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable semantic cache file {self.path}: {e}")
+            return
+
+        with self._lock:
+            for entry in entries:
+                entry["vector"] = np.asarray(entry["vector"], dtype="float32")
+                self._entries[self._next_id] = entry
+                self._next_id += 1
+            self._expire(time.time())
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrix = None
+        logger.info(f"Loaded {len(self._entries)} semantic cache entries from {self.path}")
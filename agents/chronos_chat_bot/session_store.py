@@ -0,0 +1,202 @@
+import heapq
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Bill-payment session state keyed by user id.
+
+    Every set() (re)starts the session's inactivity TTL. Sessions are plain JSON-able
+    dicts; callers must set() after changing one, since remote backends return copies.
+    Expired sessions are never returned, and reclaiming them happens off the request path.
+    """
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, user_id):
+        """The active session for user_id, or None."""
+
+    @abstractmethod
+    def set(self, user_id, session):
+        """Store the session and restart its inactivity TTL."""
+
+    @abstractmethod
+    def delete(self, user_id):
+        """Remove a session; returns True if one was active."""
+
+    def close(self):
+        pass
+
+
+class _Sweeper:
+    """Daemon thread that calls fn every interval seconds until stopped."""
+
+    def __init__(self, fn, interval):
+        self._fn = fn
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self._fn()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store; expiry deadlines sit in a min-heap drained by a background sweeper."""
+
+    def __init__(self, ttl=600, sweep_interval=30):
+        super().__init__(ttl)
+        self._sessions = {}  # user_id -> (expires_at, session)
+        self._deadlines = []  # heap of (expires_at, user_id); stale entries are skipped
+        self._lock = threading.Lock()
+        self._sweeper = _Sweeper(self.sweep, sweep_interval)
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._sessions.get(user_id)
+        if item is None or item[0] <= time.time():
+            return None
+        return item[1]
+
+    def set(self, user_id, session):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._sessions[user_id] = (expires_at, session)
+            heapq.heappush(self._deadlines, (expires_at, user_id))
+
+    def delete(self, user_id):
+        with self._lock:
+            item = self._sessions.pop(user_id, None)
+        return item is not None and item[0] > time.time()
+
+    def sweep(self):
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                expires_at, user_id = heapq.heappop(self._deadlines)
+                item = self._sessions.get(user_id)
+                # Only the newest deadline of a session counts; older heap entries are stale
+                if item is not None and item[0] == expires_at:
+                    del self._sessions[user_id]
+                    removed += 1
+        if removed:
+            logger.info(f"Expired {removed} inactive sessions")
+
+    def close(self):
+        self._sweeper.stop()
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a shared SQLite file (WAL mode), so every uvicorn worker on the host sees the same state."""
+
+    def __init__(self, path, ttl=600, sweep_interval=30):
+        super().__init__(ttl)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "user_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        self._sweeper = _Sweeper(self.sweep, sweep_interval)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE user_id = ? AND expires_at > ?", (user_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, user_id, session):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, data, expires_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(session), time.time() + self.ttl),
+            )
+
+    def delete(self, user_id):
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE user_id = ? AND expires_at > ?", (user_id, time.time())
+            )
+        return cursor.rowcount > 0
+
+    def sweep(self):
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        if cursor.rowcount:
+            logger.info(f"Expired {cursor.rowcount} inactive sessions")
+
+    def close(self):
+        self._sweeper.stop()
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis with native key expiry.
+
+    client only needs get, set(name, value, px=...) and delete, so redis-py, fakeredis or
+    any compatible stand-in works.
+    """
+
+    def __init__(self, client, ttl=600, prefix="chronos:session:"):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, user_id):
+        data = self.client.get(self.prefix + user_id)
+        return json.loads(data) if data else None
+
+    def set(self, user_id, session):
+        # Milliseconds, rounded up: a fractional ttl is kept, and one below a second never becomes 0 (rejected)
+        self.client.set(self.prefix + user_id, json.dumps(session), px=max(1, math.ceil(self.ttl * 1000)))
+
+    def delete(self, user_id):
+        return bool(self.client.delete(self.prefix + user_id))
+
+
+def create_session_store(backend=None, ttl=None):
+    """Build the store selected by CHRONOS_SESSION_BACKEND (memory, sqlite or redis)."""
+    backend = (backend or os.getenv("CHRONOS_SESSION_BACKEND", "memory")).lower()
+    ttl = ttl if ttl is not None else float(os.getenv("CHRONOS_SESSION_TTL", "600"))
+
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("CHRONOS_SESSION_DB", "chronos_sessions.db"), ttl=ttl)
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("CHRONOS_SESSION_BACKEND=redis requires the 'redis' package.")
+        client = redis.Redis.from_url(os.getenv("CHRONOS_REDIS_URL", "redis://localhost:6379/0"))
+        return RedisSessionStore(client, ttl=ttl)
+    raise ValueError(f"Unknown session backend '{backend}', expected memory, sqlite or redis")
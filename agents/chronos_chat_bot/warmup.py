@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class WarmingUp(Exception):
+    """Raised when a request needs a component that is still loading (or failed to load).
+
+    The API turns it into a retryable 503 while warm-up runs, and into a non-retryable
+    error once warm-up has failed, since nothing will retry it.
+    """
+
+
+class Warmup:
+    """Tracks background start-up of the heavy components so /ready can report progress."""
+
+    def __init__(self, stages):
+        self.stages = {name: {"status": "pending", "seconds": None} for name in stages}
+        self.ready = False
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        with self._lock:
+            self.stages[name]["status"] = "running"
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.stages[name].update(status="failed", seconds=round(time.perf_counter() - start, 3))
+            raise
+        with self._lock:
+            self.stages[name].update(status="done", seconds=round(time.perf_counter() - start, 3))
+        logger.info(f"Warm-up stage '{name}' finished in {time.perf_counter() - start:.3f}s")
+
+    def start(self, fn):
+        """Run fn in a daemon thread; the service is ready once it returns."""
+        self.started_at = time.time()
+        threading.Thread(target=self._run, args=(fn,), name="chronos-warmup", daemon=True).start()
+
+    def _run(self, fn):
+        try:
+            fn()
+            self.ready = True
+            logger.info(f"Warm-up complete in {time.time() - self.started_at:.3f}s")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        with self._lock:
+            stages = {name: dict(state) for name, state in self.stages.items()}
+        done = sum(1 for state in stages.values() if state["status"] == "done")
+        end = self.finished_at or time.time()
+        return {
+            "ready": self.ready,
+            "progress": round(done / len(stages), 2) if stages else 1.0,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else 0.0,
+            "stages": stages,
+            "error": self.error,
+        }
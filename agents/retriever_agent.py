@@ -1,13 +1,28 @@
 import sys
+import os
 sys.path.append('/content/finance-agent')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
 import torch
-from llama_index import SimpleDirectoryReader, VectorStoreIndex, ServiceContext
+from llama_index import VectorStoreIndex, ServiceContext, StorageContext, load_index_from_storage
 from llama_index.embeddings import LangchainEmbedding
+from llama_index.query_engine import RetrieverQueryEngine
 from langchain.embeddings.huggingface import HuggingFaceEmbeddings
 from shared.llm_manager import llm_manager
 from shared.models import RetrieverAgentRequest, RetrieverAgentResponse
+from retriever_manifest import Manifest
+from retriever_ingest import IngestProgress, StreamingIngestor
+from retriever_hybrid import BM25Index, CrossEncoderReranker, HybridRetriever
+from retriever_cache import RetrievalCache
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import threading
+import time
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -15,79 +30,317 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Retriever Agent Service")
 
+class RetrievedChunk(BaseModel):
+    node_id: str
+    score: Optional[float] = None  # fused / BM25 / cross-encoder score, depending on the path taken
+    text: str
+    source: Optional[str] = None  # file name the chunk came from
+    metadata: Dict[str, Any] = {}
+
+class RetrievedChunksResponse(RetrieverAgentResponse):
+    """Top-k chunks without LLM synthesis; response holds the same chunks formatted as prompt context"""
+    chunks: List[RetrievedChunk] = []
+    index_version: Optional[int] = None
+
+# What a request answers from, captured once so a concurrent rebuild cannot swap it mid-request
+LoadedIndex = namedtuple("LoadedIndex", ["documents_path", "version", "retriever", "query_engine"])
+
 class RetrieverAgent:
     def __init__(self):
         self.index = None
+        self.bm25 = None
+        self.retriever = None
         self.query_engine = None
+        self.service_context = None
+        self.documents_path = None
+        self.index_version = None
+        self.loaded = None
+        self.init_stats = None
         self.default_docs_path = "/kaggle/input/ass-raga-ai-1/finance-agent-11/agents/retriever_agent/data"  # Default path in Colab
+        self.embed_model_name = "sentence-transformers/all-mpnet-base-v2"
+        self.chunk_size = 1024
+        self.chunk_overlap = 20
+        # Lazy file reads, chunking in a process pool, fixed-size embedding batches
+        self.ingestor = StreamingIngestor.from_env(self.chunk_size, self.chunk_overlap)
+        self.ingest_progress = None
+        # "hybrid" fuses BM25 and vector results (identifier queries go BM25-only); "vector" is dense only
+        self.retrieval_mode = os.getenv("RETRIEVER_MODE", "hybrid")
+        self.similarity_top_k = int(os.getenv("RETRIEVER_TOP_K", "2"))
+        self.candidate_k = int(os.getenv("RETRIEVER_CANDIDATE_K", "20"))
+        rerank_model = os.getenv("RETRIEVER_RERANK_MODEL", "")  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+        self.reranker = CrossEncoderReranker(rerank_model) if rerank_model else None
+        # Chunk ids per query embedding and answers per (query, index version); emptied when the index changes
+        self.cache = RetrievalCache.from_env() if os.getenv("RETRIEVER_CACHE", "1") == "1" else None
+        # Persisted indexes, one subdirectory per documents_path
+        self.index_root = os.getenv("RETRIEVER_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".retriever_index"))
+        # Single-flight index build: concurrent first requests wait for one build instead of each starting one
+        self._init_lock = asyncio.Lock()
+        self._build_tasks = set()  # strong refs: builds outlive callers that stop waiting
+        self._inflight_build = None  # (documents_path, task) of the newest build
+        self.initializing = False
+        # Blocking retrievals run on worker threads; beyond workers + queue, requests get a 503
+        query_workers = int(os.getenv("RETRIEVER_QUERY_WORKERS", "4"))
+        self.query_executor = ThreadPoolExecutor(max_workers=query_workers, thread_name_prefix="retriever-query")
+        self.query_slots = threading.BoundedSemaphore(query_workers + int(os.getenv("RETRIEVER_QUERY_QUEUE", "16")))
+        self.query_timeout = float(os.getenv("RETRIEVER_QUERY_TIMEOUT", "120"))
         
     async def process(self, request: RetrieverAgentRequest) -> RetrieverAgentResponse:
         try:
-            # Initialize RAG if not already done
-            if self.query_engine is None:
-                await self._initialize_rag(request.documents_path or self.default_docs_path)
+            loaded = await self._loaded_index(request.documents_path)
             
             # Query the documents
-            response = await self._query_documents(request.query)
+            response = await self._query_documents(loaded, request.query)
             
             return RetrieverAgentResponse(
                 response=response,
                 status="success"
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Retriever Agent error: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    async def _initialize_rag(self, documents_path: str):
-        """Initialize the RAG system"""
+    async def retrieve(self, request: RetrieverAgentRequest) -> RetrievedChunksResponse:
+        """Top-k chunks with scores and source metadata, skipping the LLM synthesis step"""
         try:
-            logger.info(f"Initializing RAG with documents from: {documents_path}")
-            
-            # Load documents
-            documents = SimpleDirectoryReader(documents_path).load_data()
-            logger.info(f"Loaded {len(documents)} documents")
-            
-            # Setup embedding model
+            loaded = await self._loaded_index(request.documents_path)
+            results = await self._run_query(loaded.retriever.retrieve, request.query)
+            chunks = [
+                RetrievedChunk(
+                    node_id=result.node.node_id,
+                    score=result.score,
+                    text=result.node.get_content(),
+                    source=result.node.metadata.get("file_name") or result.node.metadata.get("file_path") or result.node.ref_doc_id,
+                    metadata=result.node.metadata,
+                )
+                for result in results
+            ]
+            return RetrievedChunksResponse(
+                response=format_context(chunks),
+                status="success",
+                chunks=chunks,
+                index_version=loaded.version,
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Retriever Agent error: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _loaded_index(self, documents_path: Optional[str] = None) -> LoadedIndex:
+        """The index a request answers from.
+
+        Without documents_path that is whatever is loaded (the default corpus if nothing is yet),
+        so an index built by POST /initialize keeps serving. An explicit documents_path loads that
+        corpus if another one is loaded.
+        """
+        if documents_path is None:
+            if self.loaded is None:
+                await self._initialize_rag(self.default_docs_path, force=False)
+            return self.loaded
+
+        documents_path = os.path.abspath(documents_path)
+        for _ in range(2):
+            loaded = self.loaded
+            if loaded is not None and loaded.documents_path == documents_path:
+                return loaded
+            await self._initialize_rag(documents_path, force=False)
+        # A request for another corpus replaced ours before this one could use it
+        raise HTTPException(status_code=503, detail="The index was switched to another corpus, retry shortly", headers={"Retry-After": "1"})
+
+    def _get_service_context(self):
+        # The embedding model is loaded once and reused by every (re)initialization
+        if self.service_context is None:
             embed_model = LangchainEmbedding(
-                HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+                HuggingFaceEmbeddings(model_name=self.embed_model_name)
             )
             
             # Create service context with shared LLM
-            service_context = ServiceContext.from_defaults(
-                chunk_size=1024,
+            self.service_context = ServiceContext.from_defaults(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
                 llm=llm_manager.llama_index_llm,
                 embed_model=embed_model
             )
+        return self.service_context
+
+    def _persist_dir(self, documents_path: str) -> str:
+        tag = hashlib.sha256(documents_path.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.index_root, f"{os.path.basename(os.path.normpath(documents_path))}-{tag}")
+
+    async def _initialize_rag(self, documents_path: str, force: bool = True):
+        """Build or refresh the index off the event loop, one build at a time.
+
+        force=False returns immediately when the index for documents_path is already loaded,
+        which is how callers that queued behind another caller's build pick up its result.
+        """
+        documents_path = os.path.abspath(documents_path)
+        inflight = self._inflight_build
+        if not force and inflight is not None and inflight[0] == documents_path and not inflight[1].done():
+            # Join the build already running for this corpus
+            return await asyncio.shield(inflight[1])
+
+        # The build task owns the lock; shield it so a caller that is cancelled (client gone,
+        # timeout) neither stops the build nor lets a second build start on the same persist dir
+        task = asyncio.ensure_future(self._build_serialized(documents_path, force))
+        self._build_tasks.add(task)
+        task.add_done_callback(self._build_tasks.discard)
+        self._inflight_build = (documents_path, task)
+        return await asyncio.shield(task)
+
+    async def _build_serialized(self, documents_path: str, force: bool):
+        async with self._init_lock:
+            if not force and self.loaded is not None and documents_path == self.loaded.documents_path:
+                return self.init_stats
+            self.initializing = True
+            try:
+                return await asyncio.to_thread(self._build_index, documents_path)
+            finally:
+                self.initializing = False
+
+    def _build_index(self, documents_path: str):
+        """Initialize the RAG system from the persisted index, re-embedding only changed files"""
+        try:
+            start = time.perf_counter()
+            logger.info(f"Initializing RAG with documents from: {documents_path}")
+
+            persist_dir = self._persist_dir(documents_path)
+            manifest = Manifest(os.path.join(persist_dir, "manifest.json"))
+            # Changing the embedding model or chunking invalidates every stored vector
+            settings = {"embed_model": self.embed_model_name, "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
+            diff = manifest.diff(documents_path, settings)
+            service_context = self._get_service_context()
+            bm25_path = os.path.join(persist_dir, "bm25.json")
+            bm25_rebuilt = False
+
+            if diff.rebuild:
+                mode = "cold"
+                # Create an empty vector index; the ingestor streams every file into it
+                index = VectorStoreIndex([], service_context=service_context)
+                bm25 = BM25Index()
+            else:
+                storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+                index = load_index_from_storage(storage_context, service_context=service_context)
+                mode = "incremental" if diff.added or diff.modified or diff.removed else "warm"
+                try:
+                    bm25 = BM25Index.load(bm25_path)
+                except (OSError, ValueError, KeyError) as e:
+                    # Indexes persisted before BM25 existed: tokenizing the stored chunks needs no embedding
+                    logger.info(f"Rebuilding BM25 index from the docstore ({e})")
+                    bm25, bm25_rebuilt = BM25Index.from_docstore(index.docstore), True
+
+                # Drop the chunks of deleted and modified files; only new and modified files are embedded below
+                for path in diff.removed + diff.modified:
+                    for doc_id in manifest.files[path].get("doc_ids", []):
+                        index.delete_ref_doc(doc_id, delete_from_docstore=True)
+                        bm25.remove_document(doc_id)
+
+            changed = diff.added + diff.modified
+            progress = self.ingest_progress = IngestProgress(files_total=len(changed))
+            try:
+                doc_ids = self.ingestor.run(changed, index, service_context.embed_model, progress, on_insert=bm25.add_nodes)
+            except Exception as e:
+                progress.finish(error=str(e))
+                raise
+            progress.finish()
+
+            if mode != "warm":
+                index.storage_context.persist(persist_dir=persist_dir)
+            if mode != "warm" or bm25_rebuilt:
+                bm25.save(bm25_path)
+            # Saved on warm starts too, so touched-but-identical files are not re-hashed next time
+            manifest.update(diff, settings, doc_ids)
+            manifest.save()
             
-            # Create vector index
-            self.index = VectorStoreIndex.from_documents(
-                documents, 
-                service_context=service_context
+            cache_version = (documents_path, manifest.version)
+            retriever = HybridRetriever(
+                index,
+                bm25 if self.retrieval_mode == "hybrid" else None,
+                self.similarity_top_k,
+                self.candidate_k,
+                reranker=self.reranker,
+                cache=self.cache,
+                version=cache_version,
             )
+            query_engine = RetrieverQueryEngine.from_args(retriever, service_context=service_context)
+
+            # Create query engine; published together so queries never see a half-swapped pair
+            self.index, self.bm25, self.retriever, self.query_engine, self.documents_path, self.index_version = (
+                index, bm25, retriever, query_engine, documents_path, manifest.version
+            )
+            self.loaded = LoadedIndex(documents_path, manifest.version, retriever, query_engine)
+            if self.cache is not None:
+                self.cache.set_version(cache_version)
+            self.init_stats = {
+                "mode": mode,
+                "seconds": round(time.perf_counter() - start, 3),
+                "added": len(diff.added),
+                "modified": len(diff.modified),
+                "removed": len(diff.removed),
+                "unchanged": len(diff.unchanged),
+                "bm25_chunks": len(bm25),
+                "index_version": manifest.version,
+                "ingest": progress.snapshot(),
+            }
             
-            # Create query engine
-            self.query_engine = self.index.as_query_engine()
-            
-            logger.info("✅ RAG system initialized successfully!")
+            logger.info(f"✅ RAG system initialized successfully! {self.init_stats}")
+            return self.init_stats
             
         except Exception as e:
             logger.error(f"Error initializing RAG: {str(e)}")
             raise
     
-    async def _query_documents(self, query: str) -> str:
+    async def _query_documents(self, loaded: LoadedIndex, query: str) -> str:
         """Query the RAG system"""
         try:
-            if self.query_engine is None:
-                raise Exception("RAG system not initialized")
-                
-            response = self.query_engine.query(query)
-            return str(response)
+            query_engine, version = loaded.query_engine, (loaded.documents_path, loaded.version)
+            if self.cache is not None:
+                answer = self.cache.get_answer(query, version)
+                if answer is not None:
+                    return answer
+
+            response = await self._run_query(query_engine.query, query)
+            answer = str(response)
+            if self.cache is not None:
+                self.cache.put_answer(query, version, answer)
+            return answer
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error querying documents: {str(e)}")
             raise
 
+    async def _run_query(self, fn, query: str):
+        """Run a blocking retrieval on the query executor, bounded by query_slots and query_timeout"""
+        if not self.query_slots.acquire(blocking=False):
+            raise HTTPException(status_code=503, detail="Retriever is busy, retry shortly", headers={"Retry-After": "1"})
+        try:
+            future = self.query_executor.submit(fn, query)
+        except Exception:
+            self.query_slots.release()
+            raise
+        # The slot is held until the work really finishes, even after a timeout: the thread keeps
+        # running, and freeing the slot early would let work pile up in the executor's queue
+        future.add_done_callback(lambda _: self.query_slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.query_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Retrieval took longer than {self.query_timeout}s")
+
+def format_context(chunks: List[RetrievedChunk]) -> str:
+    """Numbered, source-attributed chunks ready to paste into another agent's prompt"""
+    if not chunks:
+        return "No relevant documents found."
+    return "\n\n".join(
+        f"[{i}] {chunk.source or 'unknown source'} (score {chunk.score:.3f})\n{chunk.text}" if chunk.score is not None
+        else f"[{i}] {chunk.source or 'unknown source'}\n{chunk.text}"
+        for i, chunk in enumerate(chunks, start=1)
+    )
+
 # Initialize agent
 retriever_agent = RetrieverAgent()
 
@@ -95,18 +348,58 @@ retriever_agent = RetrieverAgent()
 async def process_request(request: RetrieverAgentRequest):
     return await retriever_agent.process(request)
 
+@app.post("/retrieve", response_model=RetrievedChunksResponse)
+async def retrieve_chunks(request: RetrieverAgentRequest):
+    """Raw top-k context for callers that run their own LLM; no synthesis call is made"""
+    return await retriever_agent.retrieve(request)
+
 @app.post("/initialize")
 async def initialize_rag(documents_path: str = "/content/documents"):
     """Manually initialize RAG system"""
     try:
-        await retriever_agent._initialize_rag(documents_path)
-        return {"status": "success", "message": "RAG system initialized"}
+        stats = await retriever_agent._initialize_rag(documents_path)
+        return {"status": "success", "message": "RAG system initialized", **stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/initialize")
+async def initialize_progress():
+    """Progress and throughput of the current (or last) index build"""
+    progress = retriever_agent.ingest_progress
+    return {
+        "initializing": retriever_agent.initializing,
+        "progress": progress.snapshot() if progress else None,
+        "last_init": retriever_agent.init_stats,
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters of the chunk and answer caches"""
+    if retriever_agent.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **retriever_agent.cache.stats()}
+
+@app.on_event("startup")
+async def startup():
+    # Optional eager build so the first /process does not pay for it; runs in the background
+    if os.getenv("RETRIEVER_EAGER_INIT", "0") == "1":
+        async def eager_init():
+            try:
+                await retriever_agent._initialize_rag(retriever_agent.default_docs_path, force=False)
+            except Exception as e:
+                logger.error(f"Eager RAG initialization failed: {e}")
+
+        asyncio.create_task(eager_init())
+
+@app.on_event("shutdown")
+async def shutdown():
+    retriever_agent.query_executor.shutdown(wait=False)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "agent": "Retriever Agent"}
+    index = "initializing" if retriever_agent.initializing else "ready" if retriever_agent.query_engine is not None else "not_initialized"
+    retrieval = dict(retriever_agent.retriever.counts) if retriever_agent.retriever else None
+    return {"status": "healthy", "agent": "Retriever Agent", "index": index, "mode": retriever_agent.retrieval_mode, "retrieval": retrieval}
 
 if __name__ == "__main__":
     import uvicorn
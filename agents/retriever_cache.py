@@ -0,0 +1,181 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries also expire ttl seconds after they were stored."""
+
+    def __init__(self, maxsize=256, ttl=600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """Unexpired (key, value) pairs, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, stored_at) in self._entries.items() if now - stored_at < self.ttl]
+
+    def touch(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class ChunkCache:
+    """Level 1: retrieved (node_id, score) lists per query.
+
+    By default entries are keyed exactly on the normalized query text, so a hit needs no
+    embedding at all. With a similarity threshold they are keyed on the query embedding and
+    any cached embedding with cosine similarity >= threshold hits. That is opt-in because
+    queries differing in a single token (a year, quarter or ticker: "TCS Q3 FY24 revenue" vs
+    "FY23") routinely embed above 0.98, and would silently be served each other's chunks.
+    """
+
+    def __init__(self, maxsize=1024, ttl=600.0, threshold=None):
+        self.entries = TTLCache(maxsize, ttl)
+        self.threshold = threshold
+
+    @property
+    def by_embedding(self):
+        return self.threshold is not None
+
+    @staticmethod
+    def _key(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tobytes()
+
+    def get(self, query, embedding=None):
+        if not self.by_embedding:
+            return self.entries.get(normalize_query(query))
+        key = self._key(embedding)
+        items = self.entries.items()
+        if not items:
+            self.entries.miss()
+            return None
+        keys = [cached_key for cached_key, _ in items]
+        similarities = np.frombuffer(b"".join(keys), dtype=np.float32).reshape(len(keys), -1) @ np.frombuffer(key, dtype=np.float32)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.entries.miss()
+            return None
+        self.entries.touch(keys[best])
+        return items[best][1]
+
+    def put(self, query, embedding, results):
+        self.entries.put(self._key(embedding) if self.by_embedding else normalize_query(query), results)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {**self.entries.stats(), "key": "embedding" if self.by_embedding else "query", "threshold": self.threshold}
+
+
+class RetrievalCache:
+    """Chunk-id cache (level 1) and answer cache (level 2), both scoped to one index version.
+
+    set_version() is called whenever an index is published; a different (documents_path, version)
+    empties both levels, so nothing cached outlives the documents it was computed from. Answers
+    and chunk lists computed against an older version are discarded instead of stored.
+    """
+
+    def __init__(self, answer_size=256, answer_ttl=600.0, chunk_size=1024, chunk_ttl=600.0, similarity=None):
+        self.chunks = ChunkCache(chunk_size, chunk_ttl, similarity)
+        self.answers = TTLCache(answer_size, answer_ttl)
+        self.version = None
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        ttl = float(os.getenv("RETRIEVER_CACHE_TTL", "600"))
+        # Unset: exact query match. A value (e.g. 0.98) enables approximate matching, see ChunkCache
+        similarity = os.getenv("RETRIEVER_CACHE_SIMILARITY", "")
+        return cls(
+            answer_size=int(os.getenv("RETRIEVER_ANSWER_CACHE_SIZE", "256")),
+            answer_ttl=ttl,
+            chunk_size=int(os.getenv("RETRIEVER_CHUNK_CACHE_SIZE", "1024")),
+            chunk_ttl=ttl,
+            similarity=float(similarity) if similarity else None,
+        )
+
+    def set_version(self, version):
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+                logger.info(f"Index version {self.version} -> {version}: retrieval caches cleared")
+            # Bump first so in-flight queries on the old index cannot store into the emptied caches
+            self.version = version
+            self.chunks.clear()
+            self.answers.clear()
+
+    def get_chunks(self, version, query, embedding=None):
+        return self.chunks.get(query, embedding) if version == self.version else None
+
+    def put_chunks(self, version, query, embedding, results):
+        if version == self.version:
+            self.chunks.put(query, embedding, results)
+
+    def get_answer(self, query, version):
+        if version != self.version:
+            return None
+        return self.answers.get((normalize_query(query), version))
+
+    def put_answer(self, query, version, answer):
+        if version == self.version:
+            self.answers.put((normalize_query(query), version), answer)
+
+    def stats(self):
+        return {"version": self.version, "invalidations": self.invalidations, "chunks": self.chunks.stats(), "answers": self.answers.stats()}
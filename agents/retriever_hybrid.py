@@ -0,0 +1,260 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import List
+
+from llama_index.retrievers import BaseRetriever
+from llama_index.schema import NodeWithScore, QueryBundle
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[._\-:/&][a-z0-9]+)*")
+IDENTIFIER = re.compile(r"[A-Za-z0-9]+(?:[._:][A-Za-z0-9]+)+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the this to was what when where which who why with "
+    "about does do did show me tell give latest current".split()
+)
+
+
+def tokenize(text):
+    """Lowercased terms; compound identifiers (TCS.NS, NIFTY_IT, INE009A01021) are kept whole and also split."""
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        terms.append(token)
+        parts = re.split(r"[._\-:/&]", token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+def is_identifier(token):
+    """Tickers, ISINs, scheme codes: letters mixed with digits (INE009A01021, FY24) or joined by . _ : (TCS.NS, NIFTY_IT).
+
+    Plain words and acronyms (ETF, RBI, HDFC) are not identifiers; natural-language questions use them.
+    """
+    has_digit = any(c.isdigit() for c in token)
+    has_alpha = any(c.isalpha() for c in token)
+    if has_digit and has_alpha:
+        return True
+    return has_alpha and IDENTIFIER.fullmatch(token) is not None
+
+
+def identifier_dominated(query, threshold=0.5):
+    """True when more than `threshold` of the query's content words look like identifiers."""
+    words = [word.strip("?,.!;\"'()") for word in query.split()]
+    words = [word for word in words if word and word.lower() not in STOPWORDS]
+    if not words:
+        return False
+    return sum(is_identifier(word) for word in words) / len(words) > threshold
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking, start=1):
+            scores[node_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring, updated per node and persisted next to the vector index."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {node_id: term frequency}
+        self.lengths = {}  # node_id -> number of terms
+        self.doc_nodes = defaultdict(list)  # ref_doc_id -> [node_id, ...]
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, node_id, ref_doc_id, text):
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if node_id in self.lengths:
+                return
+            for term, tf in terms.items():
+                self.postings[term][node_id] = tf
+            length = sum(terms.values())
+            self.lengths[node_id] = length
+            self.total_length += length
+            self.doc_nodes[ref_doc_id].append(node_id)
+
+    def add_nodes(self, nodes):
+        for node in nodes:
+            self.add(node.node_id, node.ref_doc_id, node.get_content())
+
+    def remove_document(self, ref_doc_id):
+        with self._lock:
+            removed = set(self.doc_nodes.pop(ref_doc_id, []))
+            if not removed:
+                return
+            for node_id in removed:
+                self.total_length -= self.lengths.pop(node_id, 0)
+            for term in list(self.postings):
+                posting = self.postings[term]
+                for node_id in removed & posting.keys():
+                    del posting[node_id]
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query, k=10):
+        """[(node_id, score)] best first."""
+        with self._lock:
+            n = len(self.lengths)
+            if not n:
+                return []
+            avg_length = self.total_length / n
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for node_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[node_id] / avg_length)
+                    scores[node_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path):
+        with self._lock:
+            data = {
+                "k1": self.k1,
+                "b": self.b,
+                "postings": self.postings,
+                "lengths": self.lengths,
+                "doc_nodes": self.doc_nodes,
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        bm25 = cls(data["k1"], data["b"])
+        bm25.postings = defaultdict(dict, data["postings"])
+        bm25.lengths = data["lengths"]
+        bm25.doc_nodes = defaultdict(list, data["doc_nodes"])
+        bm25.total_length = sum(bm25.lengths.values())
+        return bm25
+
+    @classmethod
+    def from_docstore(cls, docstore):
+        bm25 = cls()
+        bm25.add_nodes(docstore.docs.values())
+        return bm25
+
+
+class CrossEncoderReranker:
+    """Re-scores (query, chunk) pairs with a sentence-transformers cross-encoder, loaded on first use."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading cross-encoder reranker {self.model_name}")
+                self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def rerank(self, query, nodes):
+        if not nodes:
+            return nodes
+        scores = self.model.predict([(query, node.node.get_content()) for node in nodes])
+        for node, score in zip(nodes, scores):
+            node.score = float(score)
+        return sorted(nodes, key=lambda node: node.score, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense + BM25 retrieval fused with reciprocal-rank fusion, optionally cross-encoder reranked.
+
+    Queries dominated by identifiers (tickers, ISINs, fund codes) take a lexical-only path
+    that never embeds the query. With bm25=None retrieval is dense only.
+
+    Given a RetrievalCache, results of the embedding paths are cached per query (or per query
+    embedding, if the cache matches by similarity) for the index version this retriever was built on.
+    """
+
+    def __init__(self, index, bm25, top_k=2, candidate_k=20, rrf_k=60, reranker=None, cache=None, version=None):
+        self.index = index
+        self.bm25 = bm25
+        self.top_k = top_k
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.cache = cache
+        self.version = version
+        self.embed_model = index.service_context.embed_model if cache is not None else None
+        self.vector_retriever = index.as_retriever(similarity_top_k=candidate_k if bm25 is not None or reranker else top_k)
+        self.counts = Counter()
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        query = query_bundle.query_str
+        lexical = self.bm25.search(query, self.candidate_k) if self.bm25 is not None else []
+
+        if lexical and identifier_dominated(query):
+            self.counts["lexical"] += 1
+            return self._finish(query, lexical, {})
+
+        if self.cache is not None:
+            if self.cache.chunks.by_embedding and query_bundle.embedding is None:
+                # Embedded once here; the vector retriever reuses query_bundle.embedding
+                query_bundle.embedding = self.embed_model.get_agg_embedding_from_queries(query_bundle.embedding_strs)
+            cached = self.cache.get_chunks(self.version, query, query_bundle.embedding)
+            if cached is not None:
+                self.counts["cached"] += 1
+                nodes = {node.node_id: node for node in self.index.docstore.get_nodes([node_id for node_id, _ in cached])}
+                return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in cached if node_id in nodes]
+
+        if self.bm25 is None:
+            self.counts["vector"] += 1
+            dense = self.vector_retriever.retrieve(query_bundle)
+            results = self._finish(query, [(result.node.node_id, result.score) for result in dense], {result.node.node_id: result for result in dense})
+        else:
+            self.counts["hybrid"] += 1
+            dense = self.vector_retriever.retrieve(query_bundle)
+            by_id = {result.node.node_id: result for result in dense}
+            fused = reciprocal_rank_fusion([[result.node.node_id for result in dense], [node_id for node_id, _ in lexical]], self.rrf_k)
+            results = self._finish(query, fused, by_id)
+
+        if self.cache is not None:
+            self.cache.put_chunks(self.version, query, query_bundle.embedding, [(result.node.node_id, result.score) for result in results])
+        return results
+
+    def _finish(self, query, fused, by_id):
+        """Materialize ranked (node_id, score) pairs as nodes, rerank if configured, cut to top_k."""
+        ids = [node_id for node_id, _ in fused]
+        # Only the reranker needs more than top_k candidates
+        keep = self.candidate_k if self.reranker else self.top_k
+        scores = dict(fused)
+        missing = [node_id for node_id in ids[:keep] if node_id not in by_id]
+        nodes = {node.node_id: node for node in self.index.docstore.get_nodes(missing)} if missing else {}
+        results = [
+            NodeWithScore(node=by_id[node_id].node if node_id in by_id else nodes[node_id], score=scores[node_id])
+            for node_id in ids[:keep]
+            if node_id in by_id or node_id in nodes
+        ]
+
+        if self.reranker:
+            self.counts["reranked"] += 1
+            results = self.reranker.rerank(query, results)
+        return results[:self.top_k]
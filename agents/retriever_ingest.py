@@ -0,0 +1,143 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_file(path, chunk_size, chunk_overlap):
+    """Read one file and split it into nodes; runs in a worker process.
+
+    Returns (path, doc_ids, nodes). Doc ids derive from the file path, so a later run can
+    delete exactly this file's chunks.
+    """
+    from llama_index import SimpleDirectoryReader
+    from llama_index.node_parser import SimpleNodeParser
+
+    documents = SimpleDirectoryReader(input_files=[path], filename_as_id=True).load_data()
+    parser = SimpleNodeParser.from_defaults(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return path, [document.doc_id for document in documents], parser.get_nodes_from_documents(documents)
+
+
+class IngestProgress:
+    """Counters for one ingestion run, readable from other threads while it is in progress."""
+
+    def __init__(self, files_total=0):
+        self.files_total = files_total
+        self.files_done = 0
+        self.chunks_done = 0
+        self.chunks_embedded = 0
+        self.stage = "pending"
+        self.error = None
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, **counters):
+        with self._lock:
+            for name, delta in counters.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def finish(self, error=None):
+        with self._lock:
+            self.stage, self.error, self.finished_at = ("failed" if error else "done"), error, time.perf_counter()
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+            return {
+                "stage": self.stage,
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "chunks_done": self.chunks_done,
+                "chunks_embedded": self.chunks_embedded,
+                "elapsed_seconds": round(elapsed, 3),
+                "docs_per_second": round(self.files_done / elapsed, 2) if elapsed else 0.0,
+                "chunks_per_second": round(self.chunks_embedded / elapsed, 2) if elapsed else 0.0,
+                "error": self.error,
+            }
+
+
+class StreamingIngestor:
+    """Files -> chunks -> embeddings -> index, with bounded work in flight at every stage.
+
+    At most max_pending_files files are being read/chunked by the process pool at once, and
+    chunks are embedded and inserted in fixed batches of embed_batch_size as they arrive, so
+    pipeline memory depends on those two settings rather than on corpus size.
+    """
+
+    def __init__(self, chunk_size=1024, chunk_overlap=20, workers=None, embed_batch_size=256, max_pending_files=None):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.embed_batch_size = embed_batch_size
+        self.max_pending_files = max_pending_files or 2 * self.workers
+
+    @classmethod
+    def from_env(cls, chunk_size=1024, chunk_overlap=20):
+        return cls(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            workers=int(os.getenv("RETRIEVER_INGEST_WORKERS", "0")) or None,
+            embed_batch_size=int(os.getenv("RETRIEVER_EMBED_BATCH_SIZE", "256")),
+            max_pending_files=int(os.getenv("RETRIEVER_INGEST_MAX_PENDING", "0")) or None,
+        )
+
+    def run(self, paths, index, embed_model, progress, on_insert=None):
+        """Ingest paths into index; returns {path: [doc_id, ...]}.
+
+        on_insert, if given, is called with every batch of nodes once it is in the index.
+        """
+        progress.stage = "ingesting"
+        doc_ids, batch = {}, []
+
+        def flush():
+            from llama_index.schema import MetadataMode
+
+            texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+            for node, embedding in zip(batch, embed_model.get_text_embedding_batch(texts)):
+                node.embedding = embedding
+            # Nodes that already carry an embedding are stored as-is, not re-embedded
+            index.insert_nodes(list(batch))
+            if on_insert:
+                on_insert(batch)
+            progress.update(chunks_embedded=len(batch))
+            batch.clear()
+
+        def consume(result):
+            path, ids, nodes = result
+            doc_ids[path] = ids
+            progress.update(files_done=1, chunks_done=len(nodes))
+            for node in nodes:
+                batch.append(node)
+                if len(batch) >= self.embed_batch_size:
+                    flush()
+
+        if self.workers <= 1:
+            for path in paths:
+                consume(chunk_file(path, self.chunk_size, self.chunk_overlap))
+        else:
+            # spawn, not fork: this runs on a worker thread of a process that already holds torch and
+            # tokenizer threads, and forking that can deadlock. chunk_file imports what it needs itself
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending, remaining = set(), iter(paths)
+                while True:
+                    # Top up the pool lazily: files are only read once a slot frees up
+                    while len(pending) < self.max_pending_files:
+                        path = next(remaining, None)
+                        if path is None:
+                            break
+                        pending.add(pool.submit(chunk_file, path, self.chunk_size, self.chunk_overlap))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        consume(future.result())
+        if batch:
+            flush()
+
+        logger.info(f"Ingested {progress.files_done} files / {progress.chunks_embedded} chunks: {progress.snapshot()}")
+        return doc_ids
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import os
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ManifestDiff = namedtuple("ManifestDiff", ["added", "modified", "removed", "unchanged", "fingerprints", "rebuild"])
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, previous=None):
+    """size / mtime / sha256 of path; the content hash is reused when size and mtime are unchanged."""
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": previous["sha256"]}
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+
+
+def list_documents(documents_path):
+    """Files SimpleDirectoryReader would load: non-hidden files directly under documents_path."""
+    return sorted(
+        os.path.join(documents_path, name)
+        for name in os.listdir(documents_path)
+        if not name.startswith(".") and os.path.isfile(os.path.join(documents_path, name))
+    )
+
+
+class Manifest:
+    """Per-file fingerprints of what the persisted index contains, plus the settings it was built with.
+
+    version goes up on every change to the index, so caches keyed on it expire with the documents.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = 0
+        self.settings = {}
+        self.files = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                self.version, self.settings, self.files = data["version"], data["settings"], data["files"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable index manifest {path}: {e}")
+
+    def diff(self, documents_path, settings):
+        """Compare documents_path with the manifest; rebuild is True when settings changed."""
+        rebuild = settings != self.settings or not self.files
+        previous = {} if rebuild else self.files
+        fingerprints, added, modified, unchanged = {}, [], [], []
+        for path in list_documents(documents_path):
+            old = previous.get(path)
+            current = fingerprints[path] = fingerprint(path, old)
+            if old is None:
+                added.append(path)
+            elif old["sha256"] != current["sha256"]:
+                modified.append(path)
+            else:
+                unchanged.append(path)
+        removed = [path for path in previous if path not in fingerprints]
+        return ManifestDiff(added, modified, removed, unchanged, fingerprints, rebuild)
+
+    def update(self, diff, settings, doc_ids):
+        """Record the state after diff was applied; doc_ids maps each added/modified file to its index doc ids."""
+        files = {} if diff.rebuild else dict(self.files)
+        for path in diff.removed:
+            files.pop(path, None)
+        for path in diff.unchanged:
+            files[path] = {**files[path], **diff.fingerprints[path]}
+        for path in diff.added + diff.modified:
+            files[path] = {**diff.fingerprints[path], "doc_ids": doc_ids.get(path, [])}
+        if diff.rebuild or diff.added or diff.modified or diff.removed:
+            self.version += 1
+        self.settings, self.files = settings, files
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "settings": self.settings, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
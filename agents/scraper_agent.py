@@ -1,12 +1,23 @@
 
 import sys
+import os
 sys.path.append('/content/finance-agent')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException
-import requests
-from bs4 import BeautifulSoup
-import os
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+import math
+import time
+from typing import Dict, Optional
 from shared.models import ScrapingAgentRequest, ScrapingAgentResponse, MarketIndex
+from scraper_http import AsyncFetcher
+from scraper_cache import QuoteCache
+from scraper_extract import create_extractor
+from scraper_poller import MarketPoller
+from scraper_history import HistoryStore
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +28,12 @@ os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 app = FastAPI(title="Scraping Agent Service")
 
+class CachedScrapingAgentResponse(ScrapingAgentResponse):
+    """ScrapingAgentResponse plus how old the served quotes are (0 = fetched for this request)"""
+    cache_age_seconds: Optional[float] = None  # oldest quote in the response
+    quote_ages: Dict[str, Optional[float]] = {}  # per index name; None when the fetch failed
+    errors: Dict[str, str] = {}  # per index name whose fetch failed in this scrape (last good quote served if any)
+
 class ScrapingAgent:
     def __init__(self):
         self.default_tickers = {
@@ -28,84 +45,202 @@ class ScrapingAgent:
             "NIFTY_500": "NIFTY_500:INDEXNSE",
             "NIFTY_MID_LIQ_15": "NIFTY_MID_LIQ_15:INDEXNSE"
         }
+        self.base_url = os.getenv("SCRAPER_BASE_URL", "https://www.google.com/finance/quote")
+        # Shared connection pool, per-host limits, timeouts and retries for every page fetch
+        self.fetcher = AsyncFetcher.from_env()
+        # Quotes per ticker with TTL, stale-while-revalidate and one upstream fetch per ticker at a time
+        self.quote_cache = QuoteCache.from_env()
+        # HTML parsing backend (SCRAPER_EXTRACTOR); auto prefers selectolax, then lxml, then bs4
+        self.extractor = create_extractor()
+        logger.info(f"HTML extractor: {self.extractor.name}")
+        # Numeric value / change% of every fetched quote, per index, for /history
+        self.history = HistoryStore.from_env()
+        # Background refresh of default_tickers every SCRAPER_POLL_INTERVAL seconds (0 = request-driven only)
+        self.poller = MarketPoller.from_env(self._poll)
         
-    async def process(self, request: ScrapingAgentRequest) -> ScrapingAgentResponse:
+    async def process(self, request: ScrapingAgentRequest) -> CachedScrapingAgentResponse:
         try:
-            # Step 1: Scrape Nifty IT summary
-            nifty_it_summary = await self._scrape_nifty_it()
-            
-            # Step 2: Scrape market indices
-            market_indices = await self._scrape_market_indices()
-            
-            return ScrapingAgentResponse(
-                nifty_it_summary=nifty_it_summary,
-                market_indices=market_indices,
-                status="success"
-            )
+            # With the poller running this is a memory read; before its first cycle, scrape on demand
+            snapshot = self.poller.current()
+            if snapshot is not None:
+                return CachedScrapingAgentResponse(**snapshot)
+            return await self.scrape()
             
         except Exception as e:
             logger.error(f"Scraping Agent error: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+
+    async def _poll(self) -> dict:
+        return jsonable_encoder(await self.scrape(refresh=True))
+
+    async def scrape(self, refresh: bool = False) -> CachedScrapingAgentResponse:
+        """Scrape Nifty IT and the market indices; refresh=True bypasses fresh cache entries"""
+        # Nifty IT summary and all market indices are fetched concurrently
+        (nifty_it_summary, nifty_it_age, nifty_it_error), scraped = await asyncio.gather(
+            self._scrape_nifty_it(refresh),
+            self._scrape_market_indices(refresh),
+        )
+        market_indices = [index for index, _, _ in scraped]
+        quote_ages = {"NIFTY_IT": nifty_it_age, **{index.name: age for index, age, _ in scraped}}
+        errors = {"NIFTY_IT": nifty_it_error, **{index.name: error for index, _, error in scraped}}
+        ages = [age for age in quote_ages.values() if age is not None]
+        
+        return CachedScrapingAgentResponse(
+            nifty_it_summary=nifty_it_summary,
+            market_indices=market_indices,
+            status="success",
+            cache_age_seconds=round(max(ages), 3) if ages else None,
+            quote_ages={name: round(age, 3) if age is not None else None for name, age in quote_ages.items()},
+            errors={name: error for name, error in errors.items() if error},
+        )
+
+    def _last_good(self, ticker_code: str, refresh: bool):
+        """On the refresh path, the last successfully fetched value for ticker_code and its real age"""
+        return self.quote_cache.peek(ticker_code) if refresh else None
     
-    async def _scrape_nifty_it(self) -> dict:
-        """Scrape Nifty IT index data"""
+    async def _scrape_nifty_it(self, refresh: bool = False):
+        """Scrape Nifty IT index data; returns (summary, cache age in seconds or None, error or None)"""
+        ticker_code = 'NIFTY_IT:INDEXNSE'
         try:
-            ticker = 'NIFTY_IT'
-            url = f"https://www.google.com/finance/quote/{ticker}:INDEXNSE"
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            summary_data = {}
-            # Extract summary data
-            for item in soup.select('.gyFHrc'):
-                try:
-                    key = item.select_one('.mfs7Fc').text.strip()
-                    value = item.select_one('.P6K39c').text.strip()
-                    summary_data[key] = value
-                except AttributeError:
-                    continue
-                    
-            return summary_data
-            
+            read = self.quote_cache.refresh if refresh else self.quote_cache.get
+            summary, age = await read(ticker_code, lambda: self._fetch_summary(ticker_code))
+            return summary, age, None
+
         except Exception as e:
-            logger.error(f"Error scraping Nifty IT: {str(e)}")
-            return {"error": str(e)}
-    
-    async def _scrape_market_indices(self) -> list:
-        """Scrape major market indices"""
-        results = []
-        
-        for name, ticker_code in self.default_tickers.items():
-            try:
-                url = f"https://www.google.com/finance/quote/{ticker_code}"
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                try:
-                    value = soup.select_one('.YMlKec.fxKbKc').text
-                    change = soup.select_one('.JwB6zf').text
-                    results.append(MarketIndex(name=name, value=value, change=change))
-                except AttributeError:
-                    logger.warning(f"Could not find data for {name}")
-                    results.append(MarketIndex(name=name, value="N/A", change="N/A"))
-                    
-            except Exception as e:
-                logger.error(f"Error scraping {name}: {str(e)}")
-                results.append(MarketIndex(name=name, value="Error", change=str(e)))
-        
-        return results
+            error = str(e)
+            last_good = self._last_good(ticker_code, refresh)
+            if last_good is not None:
+                logger.warning(f"Refreshing Nifty IT failed, serving the last good summary: {error}")
+                return (*last_good, error)
+            if isinstance(e, LookupError):
+                return {}, None, error
+            logger.error(f"Error scraping Nifty IT: {error}")
+            return {"error": error}, None, error
+
+    async def _fetch_summary(self, ticker_code: str) -> dict:
+        html = await self.fetcher.fetch(f"{self.base_url}/{ticker_code}")
+        # Parsing is CPU-bound; keep it off the event loop so other fetches make progress
+        summary_data = await asyncio.to_thread(self.extractor.summary, html)
+        if not summary_data:
+            # Not cached: an empty page should be retried by the next request
+            raise LookupError(f"No summary data on the {ticker_code} page")
+        return summary_data
+
+    async def _scrape_market_indices(self, refresh: bool = False) -> list:
+        """Scrape major market indices; returns (MarketIndex, cache age in seconds or None, error or None) triples"""
+        # All tickers are in flight at once; results keep the default_tickers order
+        return list(await asyncio.gather(*(
+            self._scrape_index(name, ticker_code, refresh) for name, ticker_code in self.default_tickers.items()
+        )))
+
+    async def _scrape_index(self, name: str, ticker_code: str, refresh: bool = False):
+        try:
+            read = self.quote_cache.refresh if refresh else self.quote_cache.get
+            (value, change), age = await read(ticker_code, lambda: self._fetch_quote(name, ticker_code))
+            return MarketIndex(name=name, value=value, change=change), age, None
+
+        except Exception as e:
+            error = str(e)
+            # A failed poll keeps serving the last good quote, with its real age
+            last_good = self._last_good(ticker_code, refresh)
+            if last_good is not None:
+                (value, change), age = last_good
+                logger.warning(f"Refreshing {name} failed, serving the last good quote: {error}")
+                return MarketIndex(name=name, value=value, change=change), age, error
+            if isinstance(e, LookupError):
+                logger.warning(f"Could not find data for {name}")
+                return MarketIndex(name=name, value="N/A", change="N/A"), None, error
+            logger.error(f"Error scraping {name}: {error}")
+            return MarketIndex(name=name, value="Error", change=error), None, error
+
+    async def _fetch_quote(self, name: str, ticker_code: str):
+        html = await self.fetcher.fetch(f"{self.base_url}/{ticker_code}")
+        quote = await asyncio.to_thread(self.extractor.quote, html)
+        if quote is None:
+            raise LookupError(f"No quote block on the {ticker_code} page")
+        # Only upstream observations are recorded; cache hits would duplicate points
+        self.history.record(name, *quote)
+        return quote
 
 # Initialize agent
 scraping_agent = ScrapingAgent()
 
-@app.post("/process", response_model=ScrapingAgentResponse)
+@app.post("/process", response_model=CachedScrapingAgentResponse)
 async def process_request(request: ScrapingAgentRequest):
     return await scraping_agent.process(request)
 
+@app.get("/snapshot", response_model=CachedScrapingAgentResponse)
+async def snapshot():
+    current = scraping_agent.poller.current()
+    if current is None:
+        raise HTTPException(status_code=503, detail="No market snapshot yet", headers={"Retry-After": "5"})
+    return current
+
+@app.get("/stream")
+async def stream():
+    """Server-sent events: the current snapshot, then a change event whenever an index moves"""
+    async def events():
+        async for event in scraping_agent.poller.subscribe():
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/ws")
+async def websocket_stream(websocket: WebSocket):
+    """Same events as /stream, as JSON messages over a WebSocket"""
+    await websocket.accept()
+    try:
+        async for event in scraping_agent.poller.subscribe():
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/history")
+async def history(name: Optional[str] = None, window: float = 86400, max_points: int = 500):
+    """Recorded quotes from the last `window` seconds, served from memory.
+
+    With a name: that index's points plus summary stats. Without: summary stats for every index.
+    """
+    store = scraping_agent.history
+    since = time.time() - window
+    if name is None:
+        return {index: store.describe(store.query(index, since)) for index in store.buffers}
+
+    rows = store.query(name, since, max_points=max_points)
+    if rows is None:
+        raise HTTPException(status_code=404, detail=f"No history for {name}")
+    return {
+        "name": name,
+        "window": window,
+        "stats": store.describe(rows),
+        "points": [
+            {"timestamp": t, "value": value, "change_pct": None if math.isnan(change) else change}
+            for t, value, change in rows.tolist()
+        ],
+    }
+
+@app.on_event("startup")
+async def startup():
+    scraping_agent.poller.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await scraping_agent.poller.stop()
+    await scraping_agent.fetcher.aclose()
+    await asyncio.to_thread(scraping_agent.history.save)
+
 @app.get("/health") 
 async def health_check():
     return {"status": "healthy", "agent": "Scraping Agent"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        **scraping_agent.quote_cache.stats(),
+        "poller": scraping_agent.poller.stats(),
+        "history": scraping_agent.history.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
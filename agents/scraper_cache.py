@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteCache:
+    """Per-ticker cache of scraped quotes with stale-while-revalidate and single-flight loads.
+
+    - age < ttl: served from memory
+    - ttl <= age < ttl + stale_ttl: served from memory while one background task refreshes it
+    - older or missing: the caller waits for a fetch
+
+    Concurrent callers for the same key share one in-flight fetch, whichever of the
+    paths above started it. A failed load is not cached; a failed background refresh
+    leaves the stale entry in place until it expires.
+    """
+
+    def __init__(self, ttl=30.0, stale_ttl=300.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttl=float(os.getenv("SCRAPER_CACHE_TTL", "30")),
+            stale_ttl=float(os.getenv("SCRAPER_CACHE_STALE_TTL", "300")),
+        )
+
+    async def get(self, key, loader):
+        """(value, age_seconds) for key; loader() is an async callable that fetches a fresh value."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return value, age
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._load(key, loader)
+                return value, age
+
+        self.misses += 1
+        return await self.refresh(key, loader)
+
+    async def refresh(self, key, loader):
+        """Fetch key now regardless of age (joining a fetch already in flight); returns (value, age_seconds)."""
+        # shield: a caller that gives up must not cancel the fetch other callers are waiting on
+        value = await asyncio.shield(self._load(key, loader))
+        entry = self._entries.get(key)
+        return value, time.time() - entry[1] if entry is not None else 0.0
+
+    def _load(self, key, loader):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._store(key, done))
+        return task
+
+    def _store(self, key, task):
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"Quote refresh for {key} failed: {error}")
+            return
+        self._entries[key] = (task.result(), time.time())
+
+    def peek(self, key):
+        """(value, age_seconds) of the last successful load for key, however old; None if never loaded."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fetched_at = entry
+        return value, time.time() - fetched_at
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+        }
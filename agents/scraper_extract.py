@@ -0,0 +1,208 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+QUOTE_VALUE = ("YMlKec", "fxKbKc")
+QUOTE_CHANGE = ("JwB6zf",)
+SUMMARY_ITEM = ("gyFHrc",)
+SUMMARY_KEY = ("mfs7Fc",)
+SUMMARY_VALUE = ("P6K39c",)
+
+
+def css(classes):
+    return "".join(f".{name}" for name in classes)
+
+
+def class_xpath(classes, prefix="//*"):
+    tests = "".join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]" for name in classes)
+    return f"{prefix}{tests}"
+
+
+class HtmlExtractor:
+    """Pulls the quote and summary fields out of a Google Finance quote page.
+
+    quote(html) returns (value, change), or None when the page has no quote block;
+    summary(html) returns {label: value} for the key-stats table.
+    """
+
+    name = "base"
+
+    def quote(self, html):
+        raise NotImplementedError
+
+    def summary(self, html):
+        raise NotImplementedError
+
+
+class Bs4Extractor(HtmlExtractor):
+    """BeautifulSoup over the pure-Python html.parser: the original, slowest path."""
+
+    name = "bs4"
+
+    def __init__(self, parser="html.parser"):
+        self.parser = parser
+
+    def quote(self, html):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, self.parser)
+        try:
+            return soup.select_one(css(QUOTE_VALUE)).text, soup.select_one(css(QUOTE_CHANGE)).text
+        except AttributeError:
+            return None
+
+    def summary(self, html):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, self.parser)
+        summary_data = {}
+        for item in soup.select(css(SUMMARY_ITEM)):
+            try:
+                summary_data[item.select_one(css(SUMMARY_KEY)).text.strip()] = item.select_one(css(SUMMARY_VALUE)).text.strip()
+            except AttributeError:
+                continue
+        return summary_data
+
+
+class LxmlExtractor(HtmlExtractor):
+    """libxml2 tree plus XPath class lookups."""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html
+
+        self._parse = html.document_fromstring
+        self._value = etree.XPath(class_xpath(QUOTE_VALUE))
+        self._change = etree.XPath(class_xpath(QUOTE_CHANGE))
+        self._items = etree.XPath(class_xpath(SUMMARY_ITEM))
+        self._key = etree.XPath(class_xpath(SUMMARY_KEY, ".//*"))
+        self._item_value = etree.XPath(class_xpath(SUMMARY_VALUE, ".//*"))
+
+    def quote(self, html):
+        tree = self._parse(html)
+        value, change = self._value(tree), self._change(tree)
+        if not value or not change:
+            return None
+        return value[0].text_content(), change[0].text_content()
+
+    def summary(self, html):
+        summary_data = {}
+        for item in self._items(self._parse(html)):
+            key, value = self._key(item), self._item_value(item)
+            if key and value:
+                summary_data[key[0].text_content().strip()] = value[0].text_content().strip()
+        return summary_data
+
+
+class SelectolaxExtractor(HtmlExtractor):
+    """Lexbor (via selectolax) parser and CSS engine."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parse = LexborHTMLParser
+
+    def quote(self, html):
+        tree = self._parse(html)
+        value, change = tree.css_first(css(QUOTE_VALUE)), tree.css_first(css(QUOTE_CHANGE))
+        if value is None or change is None:
+            return None
+        return value.text(deep=True), change.text(deep=True)
+
+    def summary(self, html):
+        summary_data = {}
+        for item in self._parse(html).css(css(SUMMARY_ITEM)):
+            key, value = item.css_first(css(SUMMARY_KEY)), item.css_first(css(SUMMARY_VALUE))
+            if key is not None and value is not None:
+                summary_data[key.text(deep=True).strip()] = value.text(deep=True).strip()
+        return summary_data
+
+
+class TargetedExtractor(HtmlExtractor):
+    """Incremental lxml parse that stops as soon as the wanted nodes are complete.
+
+    The page is fed to an HTMLPullParser in chunks; elements are inspected as they close
+    and parsing ends once the quote pair is found, or once the container holding the
+    summary rows closes. Nothing after that point is tokenized or kept in memory.
+    """
+
+    name = "targeted"
+
+    def __init__(self, chunk_size=16384):
+        from lxml import etree
+
+        self.chunk_size = chunk_size
+        self._etree = etree
+
+    @staticmethod
+    def _has(element, classes):
+        names = (element.get("class") or "").split()
+        return all(name in names for name in classes)
+
+    def _events(self, html):
+        parser = self._etree.HTMLPullParser(events=("end",))
+        for start in range(0, len(html), self.chunk_size):
+            parser.feed(html[start:start + self.chunk_size])
+            for _, element in parser.read_events():
+                yield element
+        parser.close()
+        for _, element in parser.read_events():
+            yield element
+
+    @staticmethod
+    def _text(element):
+        return "".join(element.itertext())
+
+    def quote(self, html):
+        value = change = None
+        for element in self._events(html):
+            if value is None and self._has(element, QUOTE_VALUE):
+                value = self._text(element)
+            elif change is None and self._has(element, QUOTE_CHANGE):
+                change = self._text(element)
+            if value is not None and change is not None:
+                return value, change
+        return None
+
+    def summary(self, html):
+        summary_data, container = {}, None
+        for element in self._events(html):
+            if element is container:
+                break
+            if not self._has(element, SUMMARY_ITEM):
+                continue
+            container = element.getparent() if container is None else container
+            key = value = None
+            for child in element.iter():
+                if key is None and self._has(child, SUMMARY_KEY):
+                    key = self._text(child).strip()
+                elif value is None and self._has(child, SUMMARY_VALUE):
+                    value = self._text(child).strip()
+            if key is not None and value is not None:
+                summary_data[key] = value
+        return summary_data
+
+
+EXTRACTORS = {cls.name: cls for cls in (Bs4Extractor, LxmlExtractor, SelectolaxExtractor, TargetedExtractor)}
+
+
+def create_extractor(name=None):
+    """Extractor named by SCRAPER_EXTRACTOR (bs4|lxml|selectolax|targeted|auto).
+
+    auto picks the fastest full parser that is installed: selectolax, then lxml, then bs4.
+    """
+    name = name or os.getenv("SCRAPER_EXTRACTOR", "auto")
+    if name == "auto":
+        for candidate in ("selectolax", "lxml"):
+            try:
+                return EXTRACTORS[candidate]()
+            except ImportError:
+                continue
+        return Bs4Extractor()
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown SCRAPER_EXTRACTOR '{name}', expected one of {sorted(EXTRACTORS)} or auto")
+    return EXTRACTORS[name]()
@@ -0,0 +1,137 @@
+import logging
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUMBER = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?")
+
+
+def parse_number(text):
+    """24,000.15 -> 24000.15; NaN when the text holds no number ("N/A", "Error", ...)."""
+    match = NUMBER.search((text or "").replace("−", "-"))
+    return float(match.group().replace(",", "")) if match else math.nan
+
+
+def parse_change(text):
+    """Percent change from the change cell ("+0.42%", "−0.42%", "+102.30 (0.42%)"); NaN if absent."""
+    text = (text or "").replace("−", "-")
+    percent = re.search(r"([-+]?\d[\d,]*(?:\.\d+)?)\s*%", text)
+    if percent is None:
+        return math.nan
+    value = float(percent.group(1).replace(",", ""))
+    # "(0.42%)" carries no sign of its own; take it from the absolute change in front
+    if percent.group(1)[0] not in "+-" and text.lstrip().startswith("-"):
+        value = -value
+    return value
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value, change_pct) rows; the oldest row is overwritten when full."""
+
+    def __init__(self, capacity):
+        self.data = np.full((capacity, 3), np.nan)
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0
+
+    def append(self, row):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def rows(self):
+        """All rows, oldest first."""
+        if self.size < self.capacity:
+            return self.data[:self.size]
+        return np.concatenate([self.data[self.head:], self.data[:self.head]])
+
+    def window(self, since, until):
+        rows = self.rows()
+        # Rows are appended in time order, so the window is one contiguous slice
+        start, end = np.searchsorted(rows[:, 0], [since, until], side="left")
+        return rows[start:end]
+
+
+class HistoryStore:
+    """Per-index ring buffers of parsed quotes, optionally persisted to one .npz file."""
+
+    def __init__(self, capacity=10000, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.buffers = {}
+
+    @classmethod
+    def from_env(cls):
+        store = cls(
+            capacity=int(os.getenv("SCRAPER_HISTORY_CAPACITY", "10000")),
+            path=os.getenv("SCRAPER_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper_history.npz")) or None,
+        )
+        store.load()
+        return store
+
+    def record(self, name, value_text, change_text, timestamp=None):
+        value = parse_number(value_text)
+        if math.isnan(value):
+            return
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = self.buffers[name] = RingBuffer(self.capacity)
+        buffer.append((timestamp or time.time(), value, parse_change(change_text)))
+
+    def query(self, name, since=None, until=None, max_points=None):
+        """Points for name in [since, until), thinned to at most max_points evenly spaced rows."""
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            return None
+        rows = buffer.window(since if since is not None else -np.inf, until if until is not None else np.inf)
+        if max_points and len(rows) > max_points:
+            # Keep the newest point so the series always ends at the latest quote
+            rows = rows[np.linspace(0, len(rows) - 1, max_points).round().astype(int)]
+        return rows
+
+    @staticmethod
+    def describe(rows):
+        if rows is None or not len(rows):
+            return {"points": 0}
+        values = rows[:, 1]
+        first, last = float(values[0]), float(values[-1])
+        return {
+            "points": len(rows),
+            "from": float(rows[0, 0]),
+            "to": float(rows[-1, 0]),
+            "first": first,
+            "last": last,
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "change_pct": round(float((last - first) / first * 100), 4) if first else None,
+        }
+
+    def save(self):
+        if not self.path or not self.buffers:
+            return
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **{name: buffer.rows() for name, buffer in self.buffers.items()})
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved quote history for {len(self.buffers)} indices to {self.path}")
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as saved:
+                for name in saved.files:
+                    rows = saved[name][-self.capacity:]
+                    buffer = self.buffers[name] = RingBuffer(self.capacity)
+                    buffer.data[:len(rows)] = rows
+                    buffer.size, buffer.head = len(rows), len(rows) % self.capacity
+            logger.info(f"Loaded quote history for {len(self.buffers)} indices from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable quote history {self.path}: {e}")
+
+    def stats(self):
+        return {"indices": len(self.buffers), "points": sum(buffer.size for buffer in self.buffers.values()), "capacity": self.capacity}
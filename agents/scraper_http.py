@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncFetcher:
+    """One pooled httpx.AsyncClient for every page the scraper fetches.
+
+    Requests to the same host share a semaphore so a burst of tickers cannot flood a single
+    upstream; transport errors, timeouts and 429/5xx answers are retried with full-jitter
+    exponential backoff.
+    """
+
+    def __init__(self, max_connections=20, per_host=8, timeout=10.0, retries=2, backoff=0.25, max_backoff=4.0, headers=None):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.headers = headers or {}
+        self._client = None
+        self._host_limits = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_connections=int(os.getenv("SCRAPER_MAX_CONNECTIONS", "20")),
+            per_host=int(os.getenv("SCRAPER_PER_HOST_LIMIT", "8")),
+            timeout=float(os.getenv("SCRAPER_TIMEOUT", "10")),
+            retries=int(os.getenv("SCRAPER_RETRIES", "2")),
+            backoff=float(os.getenv("SCRAPER_RETRY_BACKOFF", "0.25")),
+        )
+
+    @property
+    def client(self):
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers=self.headers,
+                follow_redirects=True,
+            )
+        return self._client
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return limit
+
+    def _delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def fetch(self, url):
+        """Body of url as text; raises the last error once the retries are used up."""
+        for attempt in range(self.retries + 1):
+            try:
+                # The host slot is held for the request only, not for the backoff sleep
+                async with self._host_limit(url):
+                    response = await self.client.get(url)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.text
+                error = httpx.HTTPStatusError(f"{response.status_code} from {url}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            delay = self._delay(attempt)
+            logger.warning(f"Fetch of {url} failed ({error!r}), retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def fetch_all(self, urls):
+        """Fetch urls concurrently; each result is the page text or the exception it raised."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MarketPoller:
+    """Refreshes the market snapshot in the background and pushes changes to subscribers.
+
+    refresh() is an async callable returning the snapshot as a JSON-ready dict with
+    "market_indices" (each with a "name"), "quote_ages" and optionally "errors" (name ->
+    message for fetches that failed this cycle). Readers get the latest snapshot from
+    memory; subscribers receive it once on subscribe, then a "change" event listing only
+    the indices whose value or change moved. A failed fetch is never reported as a change.
+    """
+
+    def __init__(self, refresh, interval=30.0, queue_size=16):
+        self.refresh = refresh
+        self.interval = interval
+        self.queue_size = queue_size
+        self.snapshot = None
+        self.updated_at = None
+        self.version = 0
+        self.last_error = None
+        self.fetch_errors = {}  # name -> number of failed fetches
+        self._subscribers = set()
+        self._task = None
+
+    @classmethod
+    def from_env(cls, refresh):
+        return cls(
+            refresh,
+            interval=float(os.getenv("SCRAPER_POLL_INTERVAL", "30")),
+            queue_size=int(os.getenv("SCRAPER_SUBSCRIBER_QUEUE", "16")),
+        )
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self._publish(await self.refresh())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the last good snapshot; the next cycle tries again
+                self.last_error = str(e)
+                logger.error(f"Market poll failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _publish(self, snapshot):
+        previous = self.snapshot
+        errors = snapshot.get("errors") or {}
+        self.snapshot, self.updated_at = snapshot, time.time()
+        self.last_error = "; ".join(f"{name}: {error}" for name, error in errors.items()) or None
+        for name in errors:
+            self.fetch_errors[name] = self.fetch_errors.get(name, 0) + 1
+
+        changed = [index for index in self.diff(previous, snapshot) if index["name"] not in errors]
+        if previous is not None and not changed:
+            return
+        self.version += 1
+        event = {"type": "change", "version": self.version, "updated_at": self.updated_at, "changed": changed}
+        for queue in list(self._subscribers):
+            self._offer(queue, event)
+
+    @staticmethod
+    def diff(previous, current):
+        """Indices in current whose value or change differ from previous (all of them if there is none)."""
+        before = {index["name"]: index for index in (previous or {}).get("market_indices", [])}
+        return [
+            index for index in current.get("market_indices", [])
+            if (before.get(index["name"]) or {}).get("value") != index["value"]
+            or (before.get(index["name"]) or {}).get("change") != index["change"]
+        ]
+
+    def _offer(self, queue, event):
+        # A slow subscriber loses its oldest pending event instead of blocking the poller
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def current(self):
+        """Latest snapshot with quote ages advanced to now, or None before the first poll."""
+        if self.snapshot is None:
+            return None
+        elapsed = time.time() - self.updated_at
+        ages = {name: round(age + elapsed, 3) if age is not None else None for name, age in self.snapshot["quote_ages"].items()}
+        known = [age for age in ages.values() if age is not None]
+        return {**self.snapshot, "quote_ages": ages, "cache_age_seconds": max(known) if known else None}
+
+    async def subscribe(self, heartbeat=15.0):
+        """Async iterator of events: the current snapshot first, then each change.
+
+        A heartbeat event is yielded after `heartbeat` idle seconds so transports notice dead clients.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            if self.snapshot is not None:
+                yield {"type": "snapshot", "version": self.version, "updated_at": self.updated_at, "snapshot": self.current()}
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"type": "heartbeat", "version": self.version}
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "subscribers": len(self._subscribers),
+            "last_error": self.last_error,
+            "fetch_errors": self.fetch_errors,
+        }
@@ -0,0 +1,90 @@
+"""Accuracy parity and per-query latency of the Chronos embedding backends.
+
+Encodes every question in knowledge_base.json with each backend and compares it
+with the fp32 torch reference:
+
+- cosine: similarity between the backend's and the reference vector of the same text
+- top-1:  a KB index built from reference vectors is searched with the backend's
+          vectors of the questions and of lightly reworded copies (lowercased,
+          punctuation stripped); the fraction that still lands on the same question
+- gate:   the fraction whose hit stays on the same side of CHRONOS_KB_MIN_SIMILARITY
+
+Latency is measured one query at a time, like an uncached /chat request.
+
+    python benchmarks/bench_embedding_backends.py --backends torch onnx onnx-int8
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents", "chronos_chat_bot")
+sys.path.append(CHATBOT_DIR)
+from embedding_backend import BACKENDS, load_encoder  # noqa: E402
+from kb_index import IndexConfig, build_index, normalize  # noqa: E402
+
+
+def reworded(question):
+    return re.sub(r"[^\w\s]", "", question.lower()).strip()
+
+
+def latency(encoder, queries, warmup=5):
+    for query in queries[:warmup]:
+        encoder.encode(query)
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        encoder.encode(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("CHRONOS_EMBEDDING_MODEL", os.path.join(CHATBOT_DIR, "../../../hf_models/all-MiniLM-L6-v2")))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--kb", default=os.path.join(CHATBOT_DIR, "knowledge_base.json"))
+    parser.add_argument("--min-similarity", type=float, default=float(os.getenv("CHRONOS_KB_MIN_SIMILARITY", "0.5")))
+    parser.add_argument("--latency-queries", type=int, default=200)
+    parser.add_argument("--cache-root", default=os.path.join(CHATBOT_DIR, ".onnx_cache"))
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    model_path = os.path.abspath(args.model)
+    with open(args.kb, "r") as f:
+        questions = list(json.load(f))
+    texts = questions + [reworded(q) for q in questions]
+    expected = np.concatenate([np.arange(len(questions))] * 2)
+    latency_queries = (texts * (args.latency_queries // len(texts) + 1))[:args.latency_queries]
+
+    # The torch path is always the reference, even when it is not being benchmarked itself
+    reference_encoder = load_encoder(model_path, "torch")
+    reference = normalize(reference_encoder.encode(texts))
+    index = build_index(reference[:len(questions)], IndexConfig("flat"))
+    ref_sims, ref_ids = index.search(reference, 1)
+    ref_pass = ref_sims[:, 0] >= args.min_similarity
+
+    print(f"{len(questions)} KB questions (+{len(questions)} reworded), model {model_path}")
+    print(f"{'backend':<10} {'load s':>7} {'cos min':>8} {'cos mean':>9} {'top-1':>7} {'gate':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        encoder = reference_encoder if backend == "torch" else load_encoder(model_path, backend, args.cache_root, args.threads)
+        load_s = time.perf_counter() - start
+
+        vectors = normalize(encoder.encode(texts))
+        cosine = np.sum(vectors * reference, axis=1)
+        sims, ids = index.search(vectors, 1)
+        top1 = np.mean(ids[:, 0] == ref_ids[:, 0])
+        gate = np.mean((sims[:, 0] >= args.min_similarity) == ref_pass)
+        p50, p95 = latency(encoder, latency_queries)
+        print(f"{backend:<10} {load_s:>7.2f} {cosine.min():>8.4f} {cosine.mean():>9.4f} {top1:>7.3f} {gate:>7.3f} {p50:>8.2f} {p95:>8.2f}")
+
+    print(f"\nreference top-1 vs expected question: {np.mean(ref_ids[:, 0] == expected):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Parse time and memory per page of the scraper's HTML extractor backends.
+
+Runs every fixture page in --fixtures through each backend's quote() and summary()
+and reports the median time per page, the peak RSS growth and peak Python heap
+while parsing, and whether the extracted fields match the first backend listed
+(bs4, the original parser, by default).
+
+Save real Google Finance pages once (needs network), then benchmark offline:
+
+    python benchmarks/bench_html_extractors.py --save
+    python benchmarks/bench_html_extractors.py --backends bs4 lxml selectolax targeted
+
+Without fixtures, synthetic pages of --synthetic-kb size are generated with the
+quote block near the top and a large script/markup tail, like the real pages.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents")
+sys.path.append(AGENTS_DIR)
+from scraper_extract import EXTRACTORS, create_extractor  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "google_finance")
+SAVE_TICKERS = [
+    "NIFTY_IT:INDEXNSE",
+    "NIFTY_50:INDEXNSE",
+    "SENSEX:INDEXBOM",
+    "NIFTY_BANK:INDEXNSE",
+    "BSE_MIDCAP:INDEXBOM",
+    "NIFTY_NEXT_50:INDEXNSE",
+    "NIFTY_500:INDEXNSE",
+    "NIFTY_MID_LIQ_15:INDEXNSE",
+]
+
+
+def synthetic_page(size_kb, seed):
+    head = (
+        "<html><head><title>Quote</title></head><body><main>"
+        f'<div class="ln0Gqe"><div class="YMlKec fxKbKc">{24000 + seed},15</div>'
+        f'<span class="JwB6zf"><span>+{seed % 3}.42%</span></span></div>'
+        '<div class="eYanAe">'
+        + "".join(
+            f'<div class="gyFHrc"><span class="mfs7Fc">Stat {i}</span><div class="P6K39c">{i * 100 + seed}.00</div></div>'
+            for i in range(8)
+        )
+        + "</div>"
+    )
+    filler = '<div class="c-wiz"><ul>' + "".join(f'<li class="news"><a href="/n/{i}">Headline {i}</a><p>Body text {i}</p></li>' for i in range(40)) + "</ul></div>"
+    script = "<script>var data = " + json.dumps({"series": list(range(2000))}) + ";</script>"
+    page = head
+    while len(page) < size_kb * 1024:
+        page += filler + script
+    return page + "</main></body></html>"
+
+
+def load_pages(fixtures, synthetic_kb):
+    paths = sorted(glob.glob(os.path.join(fixtures, "*.html")))
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+        return pages, f"{len(paths)} fixtures from {fixtures}"
+    return [synthetic_page(synthetic_kb, i) for i in range(8)], f"8 synthetic pages of ~{synthetic_kb} KB (no fixtures in {fixtures})"
+
+
+async def save_fixtures(fixtures):
+    from scraper_http import AsyncFetcher
+
+    os.makedirs(fixtures, exist_ok=True)
+    fetcher = AsyncFetcher.from_env()
+    base_url = os.getenv("SCRAPER_BASE_URL", "https://www.google.com/finance/quote")
+    pages = await fetcher.fetch_all([f"{base_url}/{ticker}" for ticker in SAVE_TICKERS])
+    await fetcher.aclose()
+    for ticker, page in zip(SAVE_TICKERS, pages):
+        if isinstance(page, Exception):
+            print(f"{ticker}: {page!r}")
+            continue
+        with open(os.path.join(fixtures, f"{ticker.replace(':', '_')}.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+        print(f"{ticker}: {len(page) / 1024:.0f} KB")
+
+
+def measure(backend, pages, repeats):
+    """Runs in a child process so RSS and heap numbers belong to one backend only."""
+    extractor = create_extractor(backend)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = [(extractor.quote(page), extractor.summary(page)) for page in pages]
+
+    tracemalloc.start()
+    samples = []
+    for _ in range(repeats):
+        for page in pages:
+            start = time.perf_counter()
+            extractor.quote(page)
+            extractor.summary(page)
+            samples.append((time.perf_counter() - start) * 1000)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": sorted(samples)[int(0.95 * (len(samples) - 1))],
+        "rss_growth_mb": rss_growth / 1024,
+        "heap_peak_mb": heap_peak / 2 ** 20,
+        "results": [[list(quote) if quote else None, summary] for quote, summary in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=list(EXTRACTORS), choices=list(EXTRACTORS))
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--synthetic-kb", type=int, default=900)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="fetch the live quote pages into --fixtures and exit")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.save:
+        asyncio.run(save_fixtures(args.fixtures))
+        return
+
+    pages, source = load_pages(args.fixtures, args.synthetic_kb)
+    if args.child:
+        print(json.dumps(measure(args.child, pages, args.repeats)))
+        return
+
+    print(f"{source}, {sum(map(len, pages)) / len(pages) / 1024:.0f} KB/page avg, quote() + summary() per page")
+    print(f"{'backend':<11} {'median ms':>10} {'p95 ms':>8} {'RSS +MB':>8} {'heap MB':>8}  parity")
+    reference = reference_name = None
+    for backend in args.backends:
+        child = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--fixtures", args.fixtures,
+             "--synthetic-kb", str(args.synthetic_kb), "--repeats", str(args.repeats)],
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode != 0:
+            print(f"{backend:<11} unavailable: {child.stderr.strip().splitlines()[-1]}")
+            continue
+        stats = json.loads(child.stdout.strip().splitlines()[-1])
+        if reference is None:
+            reference, reference_name = stats["results"], backend
+        parity = f"same as {reference_name}" if stats["results"] == reference else "MISMATCH"
+        print(f"{backend:<11} {stats['median_ms']:>10.2f} {stats['p95_ms']:>8.2f} {stats['rss_growth_mb']:>8.1f} {stats['heap_peak_mb']:>8.1f}  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Per-message latency of the Chronos intent classifier as intents.json grows.
+
+Compares the original nested token_sort_ratio loop with the precompiled
+IntentClassifier and prints p50/p99 in microseconds. First checks that both give
+the same intent for every intents.json keyword and a set of paraphrases, and exits
+non-zero on any difference.
+
+    python benchmarks/bench_intent_classifier.py --sizes 100 1000 5000 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from rapidfuzz import fuzz
+
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents", "chronos_chat_bot")
+sys.path.append(CHATBOT_DIR)
+from intent_classifier import IntentClassifier  # noqa: E402
+
+VOCAB = (
+    "account balance card credit debit loan transfer money bill pay show my list recent "
+    "transactions open close block savings checking branch interest rate limit atm statement "
+    "mortgage insurance deposit withdraw fee charge dispute report lost stolen pin change"
+).split()
+
+
+def legacy_classify(intents, user_input):
+    best_match, highest_score = None, 0
+    user_input = user_input.lower()
+    for intent, keywords in intents.items():
+        for keyword in keywords:
+            score = fuzz.token_sort_ratio(user_input, keyword)
+            if score > highest_score:
+                highest_score, best_match = score, intent
+    return best_match if highest_score > 70 else "fallback"
+
+
+PARAPHRASES = [
+    "how do I open an account",
+    "reset my ATM PIN",
+    "hello hello",
+    "hi there",
+    "Hello!",
+    "what is my balance?",
+    "I lost my card",
+    "block my debit card please",
+    "transfer money to my savings account",
+    "show me recent transactions",
+    "",
+    "   ",
+    "?",
+]
+
+
+def paraphrases(keywords, rng):
+    """Variants of each keyword: case and punctuation changes, reordered, dropped and repeated words."""
+    variants = list(PARAPHRASES)
+    for keyword in keywords:
+        words = keyword.split()
+        variants += [keyword.upper(), keyword.title(), f"{keyword}?", f"please {keyword}", f"{keyword} {keyword}"]
+        if len(words) > 1:
+            shuffled = words[:]
+            rng.shuffle(shuffled)
+            variants += [" ".join(shuffled), " ".join(words[1:]), " ".join(words[:-1]), f"{words[0]} {keyword}"]
+    return variants
+
+
+def check_parity(intents, messages):
+    classifier = IntentClassifier(intents)
+    batch = classifier.classify_batch(messages)
+    mismatches = []
+    for message, batched in zip(messages, batch):
+        expected = legacy_classify(intents, message)
+        got = classifier.classify(message)
+        if got != expected or batched != expected:
+            mismatches.append((message, expected, got, batched))
+    for message, expected, got, batched in mismatches[:20]:
+        print(f"MISMATCH {message!r}: legacy={expected} classify={got} classify_batch={batched}")
+    print(f"parity: {len(messages) - len(mismatches)}/{len(messages)} messages agree with the legacy loop")
+    return not mismatches
+
+
+def grow_intents(base, size, rng):
+    intents = {k: list(v) for k, v in base.items()}
+    total = sum(len(v) for v in intents.values())
+    n = 0
+    while total < size:
+        phrase = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(2, 7)))
+        intents.setdefault(f"synthetic_{n % 200}", []).append(phrase)
+        total += 1
+        n += 1
+    return intents
+
+
+def percentiles(fn, messages):
+    samples = []
+    for message in messages:
+        start = time.perf_counter()
+        fn(message)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(os.path.join(CHATBOT_DIR, "intents.json")) as f:
+        base = json.load(f)
+
+    seed_phrases = [k for v in base.values() for k in v]
+    if not check_parity(base, seed_phrases + paraphrases(seed_phrases, rng)):
+        sys.exit(1)
+
+    messages = []
+    for _ in range(args.messages):
+        if rng.random() < 0.5:
+            messages.append(rng.choice(seed_phrases))
+        else:
+            messages.append(" ".join(rng.choice(VOCAB) for _ in range(rng.randint(2, 9))))
+
+    print(f"{'keywords':>9} | {'legacy p50':>11} {'legacy p99':>11} | {'engine p50':>11} {'engine p99':>11}  (us)")
+    for size in args.sizes:
+        intents = grow_intents(base, size, rng)
+        classifier = IntentClassifier(intents)
+        legacy = percentiles(lambda m: legacy_classify(intents, m), messages)
+        engine = percentiles(classifier.classify, messages)
+        print(f"{len(classifier):>9} | {legacy[0]:>11.1f} {legacy[1]:>11.1f} | {engine[0]:>11.1f} {engine[1]:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Recall@1 vs per-query latency of the Chronos knowledge-base index backends.
+
+Uses clustered synthetic unit vectors (MiniLM is 384-d) so it runs without the
+embedding model; the exact flat index is the ground truth.
+
+    python benchmarks/bench_kb_index.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents", "chronos_chat_bot"))
+from kb_index import IndexConfig, build_index, configure_search, normalize  # noqa: E402
+
+
+def synthetic(n, dim, rng, clusters=64):
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    points = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    return normalize(points)
+
+
+def measure(index, queries):
+    samples = []
+    found = np.empty(len(queries), dtype="int64")
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], 1)
+        samples.append((time.perf_counter() - start) * 1e6)
+        found[i] = ids[0][0]
+    return found, np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        vectors = synthetic(n, args.dim, rng)
+        # Queries are perturbed copies of stored questions, like paraphrased user messages
+        picks = rng.integers(0, n, args.queries)
+        queries = normalize(vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype("float32"))
+
+        print(f"\n{n} vectors, {args.dim}-d, {args.queries} queries")
+        print(f"{'backend':<22} {'build s':>8} {'recall@1':>9} {'p50 us':>9} {'p99 us':>9}")
+
+        start = time.perf_counter()
+        flat = build_index(vectors, IndexConfig("flat"))
+        flat_build = time.perf_counter() - start
+        truth, p50, p99 = measure(flat, queries)
+        print(f"{'flat':<22} {flat_build:>8.2f} {1.0:>9.3f} {p50:>9.1f} {p99:>9.1f}")
+
+        variants = [IndexConfig("ivf", nprobe=p) for p in args.nprobe]
+        variants += [IndexConfig("hnsw", ef_search=ef) for ef in args.ef_search]
+        built = {}
+        for config in variants:
+            key = config.fingerprint()
+            if key not in built:
+                start = time.perf_counter()
+                built[key] = (build_index(vectors, config), time.perf_counter() - start)
+            index, build_s = built[key]
+            configure_search(index, config)
+            found, p50, p99 = measure(index, queries)
+            label = f"ivf nprobe={config.nprobe}" if config.backend == "ivf" else f"hnsw efSearch={config.ef_search}"
+            print(f"{label:<22} {build_s:>8.2f} {np.mean(found == truth):>9.3f} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Retrieval latency of dense-only vs hybrid (BM25 + vector, RRF) vs the lexical fast path.
+
+Builds (or loads) the RetrieverAgent index for --docs in a scratch RETRIEVER_INDEX_DIR and
+times retrieval only (no LLM synthesis) for a mix of identifier and natural-language
+queries, printing which path each query took and its top chunk. First checks that
+identifier_dominated() routes ROUTING_CASES as expected and exits non-zero if not.
+Needs the retriever's runtime (llama_index, langchain, shared.llm_manager).
+
+    python benchmarks/bench_retriever_hybrid.py --docs path/to/filings --query "INE009A01021" --query "why did margins fall"
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents")
+sys.path.append(AGENTS_DIR)
+
+DEFAULT_QUERIES = ["NSE:INFY", "INE009A01021", "TCS.NS quarterly results", "how did inflation affect bank margins"]
+
+# query -> takes the lexical-only path; acronyms in natural-language questions must not
+ROUTING_CASES = {
+    "INE009A01021": True,
+    "TCS.NS": True,
+    "NSE:INFY": True,
+    "NIFTY_IT INE009A01021": True,
+    "show me INE009A01021": True,
+    "TCS.NS quarterly results": False,
+    "What is an ETF?": False,
+    "How does RBI policy affect EMI": False,
+    "Why did HDFC Bank NPA rise in FY24?": False,
+    "how did inflation affect bank margins": False,
+    "What is the rate.": False,
+}
+
+
+def timed(fn, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = fn(query)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), results
+
+
+def check_routing(identifier_dominated):
+    wrong = {query: expected for query, expected in ROUTING_CASES.items() if identifier_dominated(query) != expected}
+    for query, expected in wrong.items():
+        print(f"ROUTING {query!r}: expected {'lexical' if expected else 'hybrid'}")
+    print(f"routing: {len(ROUTING_CASES) - len(wrong)}/{len(ROUTING_CASES)} queries take the expected path")
+    return not wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", required=True, help="directory of documents to index")
+    parser.add_argument("--query", action="append", help="query to time (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("RETRIEVER_INDEX_DIR", tempfile.mkdtemp(prefix="retriever-bench-"))
+    os.environ["RETRIEVER_MODE"] = "hybrid"
+    os.environ["RETRIEVER_CACHE"] = "0"  # repeats must measure retrieval, not cache hits
+    from retriever_agent import RetrieverAgent
+    from retriever_hybrid import identifier_dominated
+
+    if not check_routing(identifier_dominated):
+        sys.exit(1)
+
+    agent = RetrieverAgent()
+    stats = asyncio.run(agent._initialize_rag(args.docs))
+    print(f"index: {stats['mode']} start, {stats['bm25_chunks']} chunks, {stats['seconds']:.2f}s")
+
+    dense = agent.index.as_retriever(similarity_top_k=agent.similarity_top_k)
+    hybrid = agent.retriever
+
+    print(f"\n{'query':<42} {'path':<8} {'dense ms':>9} {'hybrid ms':>10}  top chunk (hybrid)")
+    for query in args.query or DEFAULT_QUERIES:
+        dense_seconds, _ = timed(dense.retrieve, query, args.repeat)
+        hybrid_seconds, results = timed(hybrid.retrieve, query, args.repeat)
+        path = "lexical" if identifier_dominated(query) and agent.bm25.search(query, 1) else "hybrid"
+        top = results[0].node.get_content()[:40].replace("\n", " ") if results else "-"
+        print(f"{query[:42]:<42} {path:<8} {dense_seconds * 1000:>9.1f} {hybrid_seconds * 1000:>10.1f}  {top}")
+    print(f"\npaths taken: {dict(hybrid.counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Cold, warm and incremental start-up times of the RetrieverAgent index.
+
+Copies --docs into a scratch corpus and uses a scratch RETRIEVER_INDEX_DIR, then
+times _initialize_rag on a fresh agent (a simulated process restart) for:
+
+1. cold:        no persisted index, every file is chunked and embedded
+2. warm:        nothing changed, the persisted index is loaded as-is
+3. incremental: one file modified, one added, one deleted
+
+The embedding model is loaded once up front and reported separately, so the
+numbers are index work only. Needs the retriever's runtime (llama_index,
+langchain, shared.llm_manager).
+
+    python benchmarks/bench_retriever_startup.py --docs path/to/filings
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents")
+sys.path.append(AGENTS_DIR)
+
+
+def mutate(corpus):
+    files = sorted(name for name in os.listdir(corpus) if not name.startswith("."))
+    if len(files) < 2:
+        raise SystemExit("--docs needs at least two files for the incremental run")
+    with open(os.path.join(corpus, files[0]), "a") as f:
+        f.write("\nAddendum: figures restated for the latest quarter.\n")
+    os.remove(os.path.join(corpus, files[1]))
+    with open(os.path.join(corpus, "zz_added_note.txt"), "w") as f:
+        f.write("Newly added filing note about quarterly revenue guidance.\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", required=True, help="directory of documents to copy into the scratch corpus")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="retriever-bench-")
+    corpus = os.path.join(scratch, "docs")
+    shutil.copytree(args.docs, corpus)
+    os.environ["RETRIEVER_INDEX_DIR"] = os.path.join(scratch, "index")
+
+    from retriever_agent import RetrieverAgent
+
+    start = time.perf_counter()
+    shared_context = RetrieverAgent()._get_service_context()
+    print(f"embedding model load: {time.perf_counter() - start:.2f}s (excluded below)")
+
+    def restart():
+        agent = RetrieverAgent()
+        agent.service_context = shared_context
+        return asyncio.run(agent._initialize_rag(corpus))
+
+    try:
+        print(f"\n{'start':<12} {'seconds':>8} {'added':>6} {'modified':>9} {'removed':>8} {'unchanged':>10} {'version':>8}")
+        for label, before in (("cold", None), ("warm", None), ("incremental", mutate)):
+            if before:
+                before(corpus)
+            stats = restart()
+            assert stats["mode"] == label, f"expected a {label} start, got {stats['mode']}"
+            print(f"{label:<12} {stats['seconds']:>8.2f} {stats['added']:>6} {stats['modified']:>9} {stats['removed']:>8} {stats['unchanged']:>10} {stats['index_version']:>8}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
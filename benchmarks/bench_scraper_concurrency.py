@@ -0,0 +1,133 @@
+"""Wall time of the scraper's page fetches against a local stub quote server.
+
+The stub serves a minimal Google Finance-style page per ticker after a per-ticker
+delay; one ticker answers 503 on its first hit to exercise retry. Connections are
+warmed up first, then the concurrent batch is timed against the same fetches made
+one at a time. The batch should take about as long as the slowest single fetch, so
+it must beat the serial run by --min-speedup; exits non-zero if it does not.
+
+    python benchmarks/bench_scraper_concurrency.py            # AsyncFetcher, same URLs as the agent
+    python benchmarks/bench_scraper_concurrency.py --agent    # ScrapingAgent scrape methods (needs shared.models)
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents")
+sys.path.append(AGENTS_DIR)
+from scraper_http import AsyncFetcher  # noqa: E402
+
+TICKERS = [
+    "NIFTY_IT:INDEXNSE",
+    "NIFTY_50:INDEXNSE",
+    "SENSEX:INDEXBOM",
+    "NIFTY_BANK:INDEXNSE",
+    "BSE_MIDCAP:INDEXBOM",
+    "NIFTY_NEXT_50:INDEXNSE",
+    "NIFTY_500:INDEXNSE",
+    "NIFTY_MID_LIQ_15:INDEXNSE",
+]
+FLAKY = "SENSEX:INDEXBOM"
+
+PAGE = """<html><body>
+<div class="YMlKec fxKbKc">24,000.15</div><div class="JwB6zf">+0.42%</div>
+<div class="gyFHrc"><div class="mfs7Fc">Previous close</div><div class="P6K39c">23,900.00</div></div>
+</body></html>"""
+
+
+def make_handler(delays, hits):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ticker = self.path.rsplit("/", 1)[-1]
+            hits[ticker] = hits.get(ticker, 0) + 1
+            time.sleep(delays.get(ticker, 0.0))
+            if ticker == FLAKY and hits[ticker] == 1:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = PAGE.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+async def warm_up(base_url, fetcher):
+    """Open one pooled connection per ticker against zero-delay pages, so timing excludes connection setup."""
+    await fetcher.fetch_all([f"{base_url}/warmup-{i}" for i in range(len(TICKERS))])
+
+
+async def run_serial(base_url, fetcher):
+    start = time.perf_counter()
+    for ticker in TICKERS:
+        await fetcher.fetch(f"{base_url}/{ticker}")
+    return time.perf_counter() - start
+
+
+async def run_fetcher(base_url, fetcher):
+    await warm_up(base_url, fetcher)
+    start = time.perf_counter()
+    results = await fetcher.fetch_all([f"{base_url}/{ticker}" for ticker in TICKERS])
+    wall = time.perf_counter() - start
+    serial = await run_serial(base_url, fetcher)
+    await fetcher.aclose()
+    return [r for r in results if isinstance(r, Exception)], wall, serial
+
+
+async def run_agent(base_url):
+    os.environ["SCRAPER_BASE_URL"] = base_url
+    from scraper_agent import scraping_agent
+
+    await warm_up(base_url, scraping_agent.fetcher)
+    start = time.perf_counter()
+    (summary, _, _), scraped = await asyncio.gather(scraping_agent._scrape_nifty_it(), scraping_agent._scrape_market_indices())
+    wall = time.perf_counter() - start
+    # The agent's quote cache now holds every ticker, so the serial baseline goes through its fetcher
+    serial = await run_serial(base_url, scraping_agent.fetcher)
+    await scraping_agent.fetcher.aclose()
+    return [i for i, _, _ in scraped if i.value in ("N/A", "Error")] + ([summary] if "error" in summary else []), wall, serial
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slowest", type=float, default=1.0, help="delay of the slowest ticker in seconds")
+    parser.add_argument("--min-speedup", type=float, default=2.0, help="required serial / concurrent wall time ratio")
+    parser.add_argument("--agent", action="store_true", help="drive ScrapingAgent instead of AsyncFetcher")
+    args = parser.parse_args()
+
+    # Delays spread between a tenth of and the full slowest delay
+    delays = {t: args.slowest * (i + 1) / len(TICKERS) for i, t in enumerate(TICKERS)}
+    delays[FLAKY] = args.slowest / 10
+    hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(delays, hits))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        if args.agent:
+            failures, wall, serial = asyncio.run(run_agent(base_url))
+        else:
+            failures, wall, serial = asyncio.run(run_fetcher(base_url, AsyncFetcher(backoff=0.05)))
+    finally:
+        server.shutdown()
+
+    slowest = max(delays.values())
+    print(f"{len(TICKERS)} fetches, slowest {slowest:.2f}s, serial sum {sum(delays.values()):.2f}s")
+    print(f"wall time {wall:.2f}s concurrent, {serial:.2f}s serial ({serial / wall:.1f}x), {FLAKY} requested {hits.get(FLAKY, 0)}x, failures: {failures or 'none'}")
+    if failures or serial / wall < args.min_speedup:
+        raise SystemExit("FAIL: fetches did not complete concurrently")
+    print(f"OK: concurrent fetches {serial / wall:.1f}x faster than serial")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Start-up cost of the Chronos bot.
+
+1. Runs `python -X importtime -c "import bot"` and prints the total import time
+   plus the slowest top-level imports.
+2. Optionally (--serve) launches uvicorn and measures time until `/` answers
+   and until `/ready` reports the warm-up as complete.
+
+    python benchmarks/bench_startup.py --serve
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents", "chronos_chat_bot")
+
+
+def import_times(top):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        cwd=CHATBOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  self [us] | cumulative | imported package", nesting shown by indentation
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("import bot failed")
+
+    total = next(cumulative for cumulative, _, name in reversed(rows) if name == "bot")
+    print(f"import bot: {total / 1000:.1f} ms cumulative")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module (direct imports of bot)")
+    bot_row = next(i for i in range(len(rows) - 1, -1, -1) if rows[i][2] == "bot")
+    # Direct children are listed just before their parent, one indent level (two spaces) deep
+    children = []
+    for cumulative, self_us, name in reversed(rows[:bot_row]):
+        if not name.startswith(" "):
+            break
+        if not name.startswith("   "):
+            children.append((cumulative, self_us, name.strip()))
+    for cumulative, self_us, name in sorted(children, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+def serve_times(port, timeout):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bot:app", "--port", str(port)],
+        cwd=CHATBOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    first_response = ready_at = None
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if first_response is None and client.get(f"{url}/").status_code == 200:
+                        first_response = time.perf_counter() - start
+                    if first_response is not None:
+                        response = client.get(f"{url}/ready")
+                        if response.status_code == 200:
+                            ready_at = time.perf_counter() - start
+                            print(f"warm-up stages: {response.json()['stages']}")
+                            break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"first / response: {first_response:.2f}s" if first_response else "server never answered /")
+    print(f"/ready == 200:    {ready_at:.2f}s" if ready_at else "warm-up did not finish before the timeout")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true", help="also time a real uvicorn start")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    import_times(args.top)
+    if args.serve:
+        print()
+        serve_times(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
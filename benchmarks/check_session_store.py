@@ -0,0 +1,94 @@
+"""Run the same session-store checks against every backend.
+
+Covers set/get round trips, copies vs. shared state, delete, and inactivity expiry
+(including a sub-second TTL) for the memory, SQLite and Redis stores. RedisSessionStore
+runs against --redis-url when given, else fakeredis if it is installed, else a small
+dict-backed stand-in that mimics SET ... PX expiry and rejects PX <= 0 like Redis does.
+
+    python benchmarks/check_session_store.py
+    python benchmarks/check_session_store.py --redis-url redis://localhost:6379/15
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents", "chronos_chat_bot"))
+
+from session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+
+class DictRedis:
+    """The subset of redis-py RedisSessionStore uses, with lazy key expiry."""
+
+    def __init__(self):
+        self.data = {}  # name -> (value, expires_at or None)
+
+    def get(self, name):
+        item = self.data.get(name)
+        if item is None or (item[1] is not None and item[1] <= time.time()):
+            self.data.pop(name, None)
+            return None
+        return item[0].encode("utf-8")
+
+    def set(self, name, value, ex=None, px=None):
+        if (ex is not None and ex <= 0) or (px is not None and px <= 0):
+            raise ValueError("invalid expire time in 'set' command")
+        ttl = ex if ex is not None else px / 1000 if px is not None else None
+        self.data[name] = (value, time.time() + ttl if ttl is not None else None)
+        return True
+
+    def delete(self, name):
+        alive = self.get(name) is not None
+        self.data.pop(name, None)
+        return int(alive)
+
+
+def redis_client(url):
+    if url:
+        import redis
+
+        return redis.Redis.from_url(url), url
+    try:
+        import fakeredis
+
+        return fakeredis.FakeRedis(), "fakeredis"
+    except ImportError:
+        return DictRedis(), "dict stand-in"
+
+
+def check(name, make_store):
+    store = make_store(ttl=600)
+    session = {"state": "awaiting_bill_type", "bills": ["gas"]}
+    store.set("u1", session)
+    assert store.get("u1") == session, "set/get round trip"
+    assert store.get("missing") is None, "unknown user"
+    assert store.delete("u1") is True and store.get("u1") is None, "delete"
+    assert store.delete("u1") is False, "second delete"
+    store.close()
+
+    store = make_store(ttl=0.3)  # sub-second TTLs must still be honoured, not truncated to 0
+    store.set("u2", session)
+    assert store.get("u2") == session, "alive before the TTL"
+    time.sleep(0.5)
+    assert store.get("u2") is None, "expired after the TTL"
+    assert store.delete("u2") is False, "expired sessions are not deleted as active"
+    store.close()
+    print(f"{name:<32} ok")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", help="real Redis to test against (its keys under chronos:check: are used)")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="session-check-")
+    client, label = redis_client(args.redis_url)
+    check("memory", lambda ttl: MemorySessionStore(ttl=ttl, sweep_interval=0.1))
+    check("sqlite", lambda ttl: SQLiteSessionStore(os.path.join(scratch, "sessions.db"), ttl=ttl, sweep_interval=0.1))
+    check(f"redis ({label})", lambda ttl: RedisSessionStore(client, ttl=ttl, prefix="chronos:check:"))
+
+
+if __name__ == "__main__":
+    main()
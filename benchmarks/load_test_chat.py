@@ -0,0 +1,77 @@
+"""Closed-loop load test for the Chronos /chat endpoint.
+
+Each simulated user sends its next message as soon as the previous answer arrives.
+Reports throughput, latency percentiles and 503 (back-pressure) counts per
+concurrency level. Run it against the server before and after a change:
+
+    uvicorn bot:app --port 8000          # from agents/chronos_chat_bot
+    python benchmarks/load_test_chat.py --url http://localhost:8000 --users 1 8 64
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+
+MESSAGES = [
+    "hello",
+    "check my balance",
+    "show my transaction history",
+    "branch timings",
+    "minimum balance for savings",
+    "how to block credit card",
+    "what is the atm withdrawal limit",
+    "how do I open a savings account",
+    "what is the APR for loans",
+    "goodbye",
+]
+
+
+async def user_loop(client, url, user_id, deadline, results, rng):
+    while time.perf_counter() < deadline:
+        payload = {"user_id": user_id, "message": rng.choice(MESSAGES)}
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/chat", json=payload)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        results.append((status, time.perf_counter() - start))
+
+
+async def run_level(url, users, duration, timeout):
+    results = []
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            user_loop(client, url, f"loadtest{i}", deadline, results, random.Random(i))
+            for i in range(users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    ok = [latency for status, latency in results if status == 200]
+    busy = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - len(ok) - busy
+    p50, p99 = (np.percentile(ok, 50) * 1000, np.percentile(ok, 99) * 1000) if ok else (0.0, 0.0)
+    print(f"{users:>6} {len(ok) / elapsed:>10.1f} {p50:>9.1f} {p99:>9.1f} {busy:>6} {failed:>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    print(f"{'users':>6} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'503s':>6} {'errors':>7}")
+    for users in args.users:
+        await run_level(args.url.rstrip("/"), users, args.duration, args.timeout)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())